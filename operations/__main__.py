@@ -9,11 +9,13 @@ def main() -> None:
     path = Path(__file__).parent.parent
     sys.path.insert(0, str(path))
 
+    from operations.cli.payroll.app import app as payroll_app
     from operations.cli.users.app import app as user_app
 
     app = typer.Typer()
 
     app.add_typer(user_app, name="users")
+    app.add_typer(payroll_app, name="payroll")
 
     app()
 
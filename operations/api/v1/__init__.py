@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from . import auth, ss, tax, tax_calculator, users
+from . import auth, profiler, ss, tax, tax_calculator, users
 
 router = APIRouter()
 
@@ -9,3 +9,4 @@ router.include_router(users.router, prefix="/users", tags=["Users"])
 router.include_router(ss.router, prefix="/social-security", tags=["Social Security"])
 router.include_router(tax.router, prefix="/tax", tags=["Tax"])
 router.include_router(tax_calculator.router, prefix="/taxes-calculator", tags=["Taxes Calculator"])
+router.include_router(profiler.router, prefix="/profiler", tags=["Profiler"])
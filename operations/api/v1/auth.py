@@ -3,42 +3,51 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from operations.apps.auth.dependencies import get_current_user
+from operations.apps.auth.dependencies import get_async_current_user
 from operations.apps.auth.schemas import TokenSchema
-from operations.apps.auth.services import AuthenticationService, InvalidCredentialsError
+from operations.apps.auth.services import AsyncAuthenticationService, InvalidCredentialsError
 from operations.apps.users.models import UserDB
 from operations.apps.users.schemas import UserReadSchema
 from operations.core.config import Config, get_config
-from operations.core.db import get_db
+from operations.core.db import get_async_db
+from operations.core.executors import ExecutorSaturatedError
 from operations.core.schemas import WrapperSchema
 
 
-def get_user_service(session: Session = Depends(get_db)) -> AuthenticationService:  # noqa: B008
-    return AuthenticationService(session)
+def get_async_auth_service(
+    session: AsyncSession = Depends(get_async_db),  # noqa: B008
+) -> AsyncAuthenticationService:
+    return AsyncAuthenticationService(session)
 
 
-Service = Annotated[AuthenticationService, Depends(get_user_service)]
+Service = Annotated[AsyncAuthenticationService, Depends(get_async_auth_service)]
 
 
 router = APIRouter()
 
 
 @router.post("/token", response_model=TokenSchema, description="Login with username and password")
-def login(
+async def login(
     service: Service,
     config: Annotated[Config, Depends(get_config)],
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ):
     try:
-        user = service.authenticate_user(form_data.username, form_data.password)
+        user = await service.authenticate_user(form_data.username, form_data.password)
     except InvalidCredentialsError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         ) from None
+    except ExecutorSaturatedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        ) from None
 
     access_token = service.create_access_token(
         data={"sub": user.username},
@@ -51,5 +60,5 @@ def login(
 
 
 @router.post("/me", response_model=WrapperSchema[UserReadSchema])
-def me(current_user: Annotated[UserDB, Depends(get_current_user)]):
+async def me(current_user: Annotated[UserDB, Depends(get_async_current_user)]):
     return WrapperSchema(data=current_user)
@@ -0,0 +1,40 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, status
+
+from operations.apps.auth.dependencies import get_async_admin_user
+from operations.core.profiling import profiler
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    response_model=dict[str, Any],
+    dependencies=[Depends(get_async_admin_user)],
+    description=(
+        """
+        Get the aggregated profiling report.\n
+        - Admin user required.\n
+        - Only 1 in every sample rate requests is profiled, and only in debug mode.\n
+        - SQL statements are ranked by total time and stacks by sample count per route.
+        """
+    ),
+)
+async def get_report():
+    return profiler.report()
+
+
+@router.delete(
+    "",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(get_async_admin_user)],
+    description=(
+        """
+        Reset the aggregated profiling report.\n
+        - Admin user required.
+        """
+    ),
+)
+async def reset_report():
+    profiler.reset()
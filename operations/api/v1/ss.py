@@ -2,48 +2,84 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from operations.apps.auth.dependencies import get_admin_user, get_staff_user
+from operations.apps.auth.dependencies import get_async_admin_user, get_async_staff_user
+from operations.apps.ss.models import SocialSecurityDB
 from operations.apps.ss.schemas import SSCreateSchema, SSQueryParams, SSReadSchema, SSUpdateSchema
-from operations.apps.ss.services import SocialSecurityService, SSAlreadyExistsError, SSNotFoundError
-from operations.core.db import get_db
+from operations.apps.ss.services import (
+    AsyncSocialSecurityService,
+    SocialSecurityService,
+    SSAlreadyExistsError,
+    SSNotFoundError,
+)
+from operations.core.cache import response_cache
+from operations.core.db import get_async_db, get_db
+from operations.core.etag import get_row_etag, get_table_etag, set_etag
+from operations.core.limiter import limiter
+from operations.core.pagination import InvalidCursorError
+from operations.core.replicas import get_async_read_db
 from operations.core.schemas import WrapperSchema
+from operations.core.versions import get_row_name
 
 router = APIRouter()
-limiter = Limiter(key_func=get_remote_address)
 
 
 def get_ss_service(session: Session = Depends(get_db)) -> SocialSecurityService:
     return SocialSecurityService(session)
 
 
-Service = Annotated[SocialSecurityService, Depends(get_ss_service)]
+def get_async_ss_service(
+    session: AsyncSession = Depends(get_async_db),
+    read_session: AsyncSession = Depends(get_async_read_db),
+) -> AsyncSocialSecurityService:
+    return AsyncSocialSecurityService(session, read_session)
+
+
+Service = Annotated[AsyncSocialSecurityService, Depends(get_async_ss_service)]
+
+
+def set_ss_list_etag(request: Request) -> None:
+    set_etag(request, get_table_etag(SocialSecurityDB.__tablename__))
+
+
+def set_ss_etag(request: Request, tax_id: int) -> None:
+    set_etag(request, get_row_etag(SocialSecurityDB.__tablename__, tax_id))
 
 
 @router.get(
     "/",
     response_model=WrapperSchema[list[SSReadSchema]],
+    dependencies=[Depends(set_ss_list_etag)],
     description=(
         """
         Get all social security records.\n
+        - Pass meta.next_cursor as cursor to get the next page.\n
+        - Answers If-None-Match with 304 while the ETag is current.\n
         - Limited to 1 request per second.
         """
     ),
 )
 @limiter.limit("1/second")
-def get_all(request: Request, service: Service, params: Annotated[SSQueryParams, Query()]):
-    data = service.get_all(params.q, params.offset, params.limit, params.order_by)
-    return WrapperSchema(data=data)
+@response_cache.cached(WrapperSchema[list[SSReadSchema]], SocialSecurityDB.__tablename__)
+async def get_all(request: Request, service: Service, params: Annotated[SSQueryParams, Query()]):
+    try:
+        data = await service.get_all(
+            params.q, params.offset, params.limit, params.order_by, params.cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+
+    next_cursor = service.get_next_cursor(data, params.limit, params.order_by)
+    return WrapperSchema.model_construct(data=data, next_cursor=next_cursor)
 
 
 @router.post(
     "/",
     response_model=WrapperSchema[SSReadSchema],
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(get_staff_user)],
+    dependencies=[Depends(get_async_staff_user)],
     description=(
         """
         Create a new social security record.\n
@@ -53,9 +89,9 @@ def get_all(request: Request, service: Service, params: Annotated[SSQueryParams,
     ),
 )
 @limiter.limit("5/minute")
-def create(request: Request, service: Service, schema: Annotated[SSCreateSchema, Body()]):
+async def create(request: Request, service: Service, schema: Annotated[SSCreateSchema, Body()]):
     try:
-        data = service.create(schema)
+        data = await service.create(schema)
         return WrapperSchema(data=data)
     except SSAlreadyExistsError as e:
         raise HTTPException(status_code=400, detail=str(e)) from None
@@ -64,18 +100,25 @@ def create(request: Request, service: Service, schema: Annotated[SSCreateSchema,
 @router.get(
     "/{tax_id}",
     response_model=WrapperSchema[SSReadSchema],
+    dependencies=[Depends(set_ss_etag)],
     description=(
         """
         Get a social security record by id.\n
+        - Answers If-None-Match with 304 while the ETag is current.\n
         - Limited to 1 request per second.
         """
     ),
 )
 @limiter.limit("1/second")
-def get_by_id(request: Request, service: Service, tax_id: int):
+@response_cache.cached(
+    WrapperSchema[SSReadSchema],
+    get_row_name(SocialSecurityDB.__tablename__),
+    get_row_name(SocialSecurityDB.__tablename__, "{tax_id}"),
+)
+async def get_by_id(request: Request, service: Service, tax_id: int):
     try:
-        data = service.get_by_id(tax_id)
-        return WrapperSchema(data=data)
+        data = await service.get_by_id(tax_id)
+        return WrapperSchema.model_construct(data=data)
     except SSNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
 
@@ -84,7 +127,7 @@ def get_by_id(request: Request, service: Service, tax_id: int):
     "/{tax_id}",
     response_model=WrapperSchema[SSReadSchema],
     status_code=status.HTTP_202_ACCEPTED,
-    dependencies=[Depends(get_staff_user)],
+    dependencies=[Depends(get_async_staff_user)],
     description=(
         """
         Update a social security record.\n
@@ -94,11 +137,11 @@ def get_by_id(request: Request, service: Service, tax_id: int):
     ),
 )
 @limiter.limit("5/minute")
-def update(
+async def update(
     request: Request, service: Service, tax_id: int, schema: Annotated[SSUpdateSchema, Body()]
 ):
     try:
-        data = service.update(tax_id, schema)
+        data = await service.update(tax_id, schema)
         return WrapperSchema(data=data)
     except SSNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
@@ -109,7 +152,7 @@ def update(
 @router.delete(
     "/{tax_id}",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Delete a social security record.\n
@@ -119,9 +162,9 @@ def update(
     ),
 )
 @limiter.limit("5/minute")
-def delete(request: Request, service: Service, tax_id: int):
+async def delete(request: Request, service: Service, tax_id: int):
     try:
-        service.delete(tax_id)
+        await service.delete(tax_id)
     except SSNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
 
@@ -129,7 +172,7 @@ def delete(request: Request, service: Service, tax_id: int):
 @router.delete(
     "/bulk",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Delete multiple social security records.\n
@@ -139,9 +182,9 @@ def delete(request: Request, service: Service, tax_id: int):
     ),
 )
 @limiter.limit("5/minute")
-def delete_bulk(request: Request, service: Service, ss_ids: Annotated[set[int], Body()]):
+async def delete_bulk(request: Request, service: Service, ss_ids: Annotated[set[int], Body()]):
     try:
-        service.delete_bulk(ss_ids)
+        await service.delete_bulk(ss_ids)
     except SSNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
 
@@ -149,7 +192,7 @@ def delete_bulk(request: Request, service: Service, ss_ids: Annotated[set[int],
 @router.delete(
     "/empty",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Delete all social security records.\n
@@ -159,5 +202,5 @@ def delete_bulk(request: Request, service: Service, ss_ids: Annotated[set[int],
     ),
 )
 @limiter.limit("5/minute")
-def empty(request: Request, service: Service):
-    service.empty()
+async def empty(request: Request, service: Service):
+    await service.empty()
@@ -2,64 +2,107 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from operations.apps.auth.dependencies import get_admin_user, get_staff_user
+from operations.apps.auth.dependencies import get_async_admin_user, get_async_staff_user
+from operations.apps.tax.models import TaxDB
 from operations.apps.tax.schemas import (
     TaxCreateSchema,
     TaxQueryParams,
     TaxReadSchema,
     TaxUpdateSchema,
 )
-from operations.apps.tax.services import TaxAlreadyExistsError, TaxNotFoundError, TaxService
-from operations.core.db import get_db
+from operations.apps.tax.services import (
+    AsyncTaxService,
+    TaxAlreadyExistsError,
+    TaxNotFoundError,
+    TaxService,
+)
+from operations.core.cache import response_cache
+from operations.core.db import get_async_db, get_db
+from operations.core.etag import get_row_etag, get_table_etag, set_etag
+from operations.core.limiter import limiter
+from operations.core.pagination import InvalidCursorError
+from operations.core.replicas import get_async_read_db
 from operations.core.schemas import WrapperSchema
+from operations.core.versions import get_row_name
 
 
 def get_tax_service(session: Session = Depends(get_db)) -> TaxService:
     return TaxService(session)
 
 
-Service = Annotated[TaxService, Depends(get_tax_service)]
+def get_async_tax_service(
+    session: AsyncSession = Depends(get_async_db),
+    read_session: AsyncSession = Depends(get_async_read_db),
+) -> AsyncTaxService:
+    return AsyncTaxService(session, read_session)
+
+
+Service = Annotated[AsyncTaxService, Depends(get_async_tax_service)]
+
+
+def set_taxes_etag(request: Request) -> None:
+    set_etag(request, get_table_etag(TaxDB.__tablename__))
+
+
+def set_tax_etag(request: Request, tax_id: int) -> None:
+    set_etag(request, get_row_etag(TaxDB.__tablename__, tax_id))
 
 
 router = APIRouter()
-limiter = Limiter(key_func=get_remote_address)
 
 
 @router.get(
     "/",
     response_model=WrapperSchema[list[TaxReadSchema]],
+    dependencies=[Depends(set_taxes_etag)],
     description=(
         """
         Get all tax records.\n
+        - Pass meta.next_cursor as cursor to get the next page.\n
+        - Answers If-None-Match with 304 while the ETag is current.\n
         - Limited to 1 request per second.
         """
     ),
 )
 @limiter.limit("1/second")
-def get_all(request: Request, service: Service, params: Annotated[TaxQueryParams, Query()]):
-    data = service.get_all(params.q, params.offset, params.limit, params.order_by)
-    return WrapperSchema(data=data)
+@response_cache.cached(WrapperSchema[list[TaxReadSchema]], TaxDB.__tablename__)
+async def get_all(request: Request, service: Service, params: Annotated[TaxQueryParams, Query()]):
+    try:
+        data = await service.get_all(
+            params.q, params.offset, params.limit, params.order_by, params.cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+
+    next_cursor = service.get_next_cursor(data, params.limit, params.order_by)
+    return WrapperSchema.model_construct(data=data, next_cursor=next_cursor)
 
 
 @router.get(
     "/{tax_id}",
     response_model=WrapperSchema[TaxReadSchema],
+    dependencies=[Depends(set_tax_etag)],
     description=(
         """
         Get a tax record by id.\n
+        - Answers If-None-Match with 304 while the ETag is current.\n
         - Limited to 1 request per second.
         """
     ),
 )
 @limiter.limit("1/second")
-def get_by_id(request: Request, service: Service, tax_id: int):
+@response_cache.cached(
+    WrapperSchema[TaxReadSchema],
+    get_row_name(TaxDB.__tablename__),
+    get_row_name(TaxDB.__tablename__, "{tax_id}"),
+)
+async def get_by_id(request: Request, service: Service, tax_id: int):
     try:
-        data = service.get_by_id(tax_id)
-        return WrapperSchema(data=data)
+        data = await service.get_by_id(tax_id)
+        return WrapperSchema.model_construct(data=data)
     except TaxNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
 
@@ -68,7 +111,7 @@ def get_by_id(request: Request, service: Service, tax_id: int):
     "/",
     response_model=WrapperSchema[TaxReadSchema],
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(get_staff_user)],
+    dependencies=[Depends(get_async_staff_user)],
     description=(
         """
         Create a new tax record.\n
@@ -78,9 +121,9 @@ def get_by_id(request: Request, service: Service, tax_id: int):
     ),
 )
 @limiter.limit("5/minute")
-def create(request: Request, service: Service, schema: Annotated[TaxCreateSchema, Body()]):
+async def create(request: Request, service: Service, schema: Annotated[TaxCreateSchema, Body()]):
     try:
-        data = service.create(schema)
+        data = await service.create(schema)
         return WrapperSchema(data=data)
     except TaxAlreadyExistsError as e:
         raise HTTPException(status_code=400, detail=str(e)) from None
@@ -90,7 +133,7 @@ def create(request: Request, service: Service, schema: Annotated[TaxCreateSchema
     "/{tax_id}",
     response_model=WrapperSchema[TaxReadSchema],
     status_code=status.HTTP_202_ACCEPTED,
-    dependencies=[Depends(get_staff_user)],
+    dependencies=[Depends(get_async_staff_user)],
     description=(
         """
         Update a tax record.\n
@@ -100,11 +143,11 @@ def create(request: Request, service: Service, schema: Annotated[TaxCreateSchema
     ),
 )
 @limiter.limit("5/minute")
-def update(
+async def update(
     request: Request, service: Service, tax_id: int, schema: Annotated[TaxUpdateSchema, Body()]
 ):
     try:
-        data = service.update(tax_id, schema)
+        data = await service.update(tax_id, schema)
         return WrapperSchema(data=data)
     except TaxNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
@@ -115,7 +158,7 @@ def update(
 @router.delete(
     "/{tax_id}",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Delete a tax record.\n
@@ -125,9 +168,9 @@ def update(
     ),
 )
 @limiter.limit("5/minute")
-def delete(request: Request, service: Service, tax_id: int):
+async def delete(request: Request, service: Service, tax_id: int):
     try:
-        service.delete(tax_id)
+        await service.delete(tax_id)
     except TaxNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
 
@@ -135,7 +178,7 @@ def delete(request: Request, service: Service, tax_id: int):
 @router.delete(
     "/bulk",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Delete multiple tax records.\n
@@ -145,9 +188,9 @@ def delete(request: Request, service: Service, tax_id: int):
     ),
 )
 @limiter.limit("5/minute")
-def delete_bulk(request: Request, service: Service, tax_ids: Annotated[set[int], Body()]):
+async def delete_bulk(request: Request, service: Service, tax_ids: Annotated[set[int], Body()]):
     try:
-        service.delete_bulk(tax_ids)
+        await service.delete_bulk(tax_ids)
     except TaxNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
 
@@ -155,7 +198,7 @@ def delete_bulk(request: Request, service: Service, tax_ids: Annotated[set[int],
 @router.delete(
     "/empty",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Delete all tax records.\n
@@ -165,5 +208,5 @@ def delete_bulk(request: Request, service: Service, tax_ids: Annotated[set[int],
     ),
 )
 @limiter.limit("5/minute")
-def empty(request: Request, service: Service):
-    service.empty()
+async def empty(request: Request, service: Service):
+    await service.empty()
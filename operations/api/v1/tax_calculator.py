@@ -1,9 +1,7 @@
 # ruff: noqa: B008 ARG001
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from syriantaxes import Rounder, SocialSecurity
 
@@ -14,86 +12,86 @@ from operations.apps.config.schemas import (
     TaxesCalculatorConfigUpdateSchema,
 )
 from operations.apps.ss.services import SocialSecurityService, SSNotFoundError
-from operations.apps.tax.models import TaxDB
+from operations.apps.tax.compiled import CompiledTax
 from operations.apps.tax.services import TaxNotFoundError, TaxService
-from operations.apps.taxes_calculator.schemas import GrossInSchema, SalaryOutSchema
-from operations.apps.taxes_calculator.services import TaxesCalculatorService
+from operations.apps.taxes_calculator.context import (
+    CONTEXT_TABLES,
+    CalculatorContext,
+    calculator_contexts,
+)
+from operations.apps.taxes_calculator.schemas import (
+    GrossBatchRowOutSchema,
+    GrossInSchema,
+    NetInSchema,
+    SalaryOutSchema,
+)
+from operations.apps.taxes_calculator.services import (
+    DefaultSSNotSetError,
+    DefaultTaxNotSetError,
+    TaxesCalculatorResolver,
+    TaxesCalculatorService,
+    calculator_cache,
+)
+from operations.apps.taxes_calculator.streaming import UnsupportedMediaTypeError, get_codec
+from operations.core.cache import response_cache
 from operations.core.db import get_db
+from operations.core.limiter import limiter
+from operations.core.profiling import profiler
+from operations.core.responses import DuplexStreamingResponse
+from operations.core.schemas import WrapperSchema
 
 from .ss import get_ss_service
 from .tax import get_tax_service
 
 
-def _get_tax_config_db(session: Session = Depends(get_db)) -> TaxesCalculatorConfigDB:
-    return TaxesCalculatorConfigDB.load(session)
+def get_calculator_context(session: Session = Depends(get_db)) -> CalculatorContext:
+    return calculator_contexts.get(session)
 
 
-def _get_tax_rounder(tax_config: TaxesCalculatorConfigDB = Depends(_get_tax_config_db)) -> Rounder:
-    return Rounder(
-        method=tax_config.tax_rounding_method,
-        to_nearest=tax_config.tax_rounding_to_nearest,
-    )
+def _get_tax_rounder(context: CalculatorContext = Depends(get_calculator_context)) -> Rounder:
+    return context.tax_rounder
 
 
-def _get_ss_rounder(tax_config: TaxesCalculatorConfigDB = Depends(_get_tax_config_db)) -> Rounder:
-    return Rounder(
-        method=tax_config.ss_rounding_method,
-        to_nearest=tax_config.ss_rounding_to_nearest,
-    )
+def get_resolver(
+    tax_service: TaxService = Depends(get_tax_service),
+    ss_service: SocialSecurityService = Depends(get_ss_service),
+    context: CalculatorContext = Depends(get_calculator_context),
+) -> TaxesCalculatorResolver:
+    return TaxesCalculatorResolver(tax_service, ss_service, calculator_contexts.get_cache(context))
 
 
 def get_ss(
-    ss_service: SocialSecurityService = Depends(get_ss_service),
-    tax_config: TaxesCalculatorConfigDB = Depends(_get_tax_config_db),
-    ss_rounder: Rounder = Depends(_get_ss_rounder),
+    resolver: TaxesCalculatorResolver = Depends(get_resolver),
     ss_id: Annotated[int, Query()] | None = None,
 ) -> SocialSecurity:
-    if tax_config.default_ss is not None and ss_id is None:
-        ss_db_obj = tax_config.default_ss
-        return SocialSecurity(
-            min_salary=ss_db_obj.min_allowed_salary,
-            deduction_rate=ss_db_obj.deduction_rate,
-            rounder=ss_rounder,
-        )
-
-    if ss_id is not None:
-        try:
-            ss_db_obj = ss_service.get_by_id(ss_id)
-            return SocialSecurity(
-                min_salary=ss_db_obj.min_allowed_salary,
-                deduction_rate=ss_db_obj.deduction_rate,
-                rounder=ss_rounder,
-            )
-        except SSNotFoundError as e:
-            raise HTTPException(status_code=404, detail=str(e)) from None
-
-    raise HTTPException(status_code=400, detail="No ss id provided and no default ss id set")
+    try:
+        return resolver.get_ss(ss_id)
+    except SSNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from None
+    except DefaultSSNotSetError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
 
 
-def get_tax_db(
-    tax_service: TaxService = Depends(get_tax_service),
-    tax_config: TaxesCalculatorConfigDB = Depends(_get_tax_config_db),
+def get_tax(
+    resolver: TaxesCalculatorResolver = Depends(get_resolver),
     tax_id: Annotated[int, Query()] | None = None,
-) -> TaxDB:
-    if tax_config.default_tax is not None and tax_id is None:
-        return tax_config.default_tax
-
-    if tax_id is not None:
-        try:
-            return tax_service.get_by_id(tax_id)
-        except TaxNotFoundError as e:
-            raise HTTPException(status_code=404, detail=str(e)) from None
-
-    raise HTTPException(status_code=400, detail="No tax id provided and no default tax id set")
+) -> CompiledTax:
+    try:
+        return resolver.get_tax(tax_id)
+    except TaxNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from None
+    except DefaultTaxNotSetError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
 
 
 Service = Annotated[TaxesCalculatorService, Depends(TaxesCalculatorService)]
+Context = Annotated[CalculatorContext, Depends(get_calculator_context)]
 TaxRounder = Annotated[Rounder, Depends(_get_tax_rounder)]
-TaxDBDependency = Annotated[TaxDB, Depends(get_tax_db)]
+TaxDependency = Annotated[CompiledTax, Depends(get_tax)]
+Resolver = Annotated[TaxesCalculatorResolver, Depends(get_resolver)]
 
 
 router = APIRouter()
-limiter = Limiter(key_func=get_remote_address)
 
 
 @router.get(
@@ -109,6 +107,8 @@ limiter = Limiter(key_func=get_remote_address)
     ),
 )
 @limiter.limit("1/second")
+@response_cache.cached(TaxesCalculatorConfigReadSchema, *CONTEXT_TABLES)
+@profiler.track_thread
 def get_taxes_calculator_config(request: Request, session: Annotated[Session, Depends(get_db)]):
     return TaxesCalculatorConfigDB.load(session)
 
@@ -125,6 +125,7 @@ def get_taxes_calculator_config(request: Request, session: Annotated[Session, De
         """
     ),
 )
+@profiler.track_thread
 def update_taxes_calculator_config(
     session: Annotated[Session, Depends(get_db)],
     schema: Annotated[TaxesCalculatorConfigUpdateSchema, Body()],
@@ -133,33 +134,156 @@ def update_taxes_calculator_config(
     return TaxesCalculatorConfigDB.update(session, **schema_dict)
 
 
+@router.get(
+    "/cache",
+    response_model=dict[str, int | float],
+    dependencies=[Depends(get_admin_user)],
+    description=(
+        """
+        Get the calculator result cache stats.\n
+        - Admin user required.\n
+        - Size is the memory used by cached responses in bytes.
+        """
+    ),
+)
+@profiler.track_thread
+def get_calculator_cache_stats():
+    return calculator_cache.stats()
+
+
 @router.post(
     "/gross",
     response_model=SalaryOutSchema,
     description=(
         """
         Calculate the taxes for a salary.\n
+        - Results for repeated inputs are served from a cache.\n
         - Limited to 1 request per second.
         """
     ),
 )
 @limiter.limit("1/second")
+@profiler.track_thread
 def calculate_gross(  # noqa: PLR0913
     request: Request,
     service: Service,
-    tax_db: TaxDBDependency,
+    tax: TaxDependency,
     tax_rounder: TaxRounder,
     ss: Annotated[SocialSecurity, Depends(get_ss)],
+    context: Context,
     schema: Annotated[GrossInSchema, Body()],
 ):
     try:
-        return service.calculate_gross(
+        body = service.calculate_gross_json(
+            version=context.version,
             salary=schema.salary,
             compensation=schema.compensation,
-            tax=tax_db,
+            tax=tax,
             rounder=tax_rounder,
             ss=ss,
             ss_salary=schema.ss_salary,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from None
+
+    return Response(content=body, media_type="application/json")
+
+
+@router.post(
+    "/net",
+    response_model=SalaryOutSchema,
+    description=(
+        """
+        Calculate the gross salary that gives a net salary.\n
+        - The compensation is taken as gross.\n
+        - The smallest gross salary is returned when several give the same net.\n
+        - Results for repeated inputs are served from a cache.\n
+        - Limited to 1 request per second.
+        """
+    ),
+)
+@limiter.limit("1/second")
+@profiler.track_thread
+def calculate_net(  # noqa: PLR0913
+    request: Request,
+    service: Service,
+    tax: TaxDependency,
+    tax_rounder: TaxRounder,
+    ss: Annotated[SocialSecurity, Depends(get_ss)],
+    context: Context,
+    schema: Annotated[NetInSchema, Body()],
+):
+    try:
+        body = service.calculate_net_json(
+            version=context.version,
+            net=schema.net,
+            compensation=schema.compensation,
+            tax=tax,
+            rounder=tax_rounder,
+            ss=ss,
+            ss_salary=schema.ss_salary,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+
+    return Response(content=body, media_type="application/json")
+
+
+@router.post(
+    "/gross/batch",
+    response_model=WrapperSchema[list[GrossBatchRowOutSchema]],
+    description=(
+        """
+        Calculate the taxes for multiple salaries.\n
+        - Each row gets either a result or an error.\n
+        - Limited to 1 request per second.
+        """
+    ),
+)
+@limiter.limit("1/second")
+@profiler.track_thread
+def calculate_gross_batch(
+    request: Request,
+    service: Service,
+    resolver: Resolver,
+    tax_rounder: TaxRounder,
+    rows: Annotated[list[GrossInSchema], Body()],
+):
+    data = service.calculate_gross_batch(rows, resolver=resolver, rounder=tax_rounder)
+    return WrapperSchema(data=data)
+
+
+@router.post(
+    "/gross/stream",
+    response_class=DuplexStreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+    description=(
+        """
+        Calculate the taxes for a CSV or NDJSON upload of salaries.\n
+        - Rows need salary and may have compensation, ss_salary, tax_id and ss_id.\n
+        - Rows are streamed back in the upload format as they are calculated.\n
+        - Limited to 1 request per second.
+        """
+    ),
+)
+@limiter.limit("1/second")
+async def calculate_gross_stream(
+    request: Request, service: Service, resolver: Resolver, tax_rounder: TaxRounder
+):
+    try:
+        codec = get_codec(request.headers.get("content-type", ""))
+    except UnsupportedMediaTypeError as e:
+        raise HTTPException(status_code=415, detail=str(e)) from None
+
+    return DuplexStreamingResponse(
+        service.calculate_gross_stream(request.stream(), codec, resolver, tax_rounder),
+        media_type=codec.media_type,
+    )
@@ -3,11 +3,9 @@ from typing import Annotated
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
 from pydantic import SecretStr
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from operations.apps.auth.dependencies import get_admin_user, get_user
+from operations.apps.auth.dependencies import get_async_admin_user, get_async_user
 from operations.apps.users.models import Role
 from operations.apps.users.schemas import (
     UserChangePasswordSchema,
@@ -18,49 +16,65 @@ from operations.apps.users.schemas import (
     UserUpdateSchema,
 )
 from operations.apps.users.services import (
+    AsyncUserService,
     EmailAlreadyExistsError,
     PasswordIncorrectError,
     UsernameAlreadyExistsError,
     UserNotFoundError,
-    UserService,
 )
-from operations.core.db import get_db
+from operations.core.db import get_async_db
+from operations.core.executors import ExecutorSaturatedError
+from operations.core.limiter import limiter
+from operations.core.pagination import InvalidCursorError
+from operations.core.replicas import get_async_read_db
 from operations.core.schemas import WrapperSchema
+from operations.core.serialization import serialized
 
 
-def get_user_service(session: Session = Depends(get_db)) -> UserService:
-    return UserService(session)
+def get_async_user_service(
+    session: AsyncSession = Depends(get_async_db),
+    read_session: AsyncSession = Depends(get_async_read_db),
+) -> AsyncUserService:
+    return AsyncUserService(session, read_session)
 
 
-Service = Annotated[UserService, Depends(get_user_service)]
+Service = Annotated[AsyncUserService, Depends(get_async_user_service)]
 
 
 router = APIRouter()
-limiter = Limiter(key_func=get_remote_address)
 
 
 @router.get(
     "/",
     response_model=WrapperSchema[list[UserReadSchema]],
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Get all users.\n
         - Admin user required.\n
+        - Pass meta.next_cursor as cursor to get the next page.\n
         - Limited to 5 requests per minute.
         """
     ),
 )
 @limiter.limit("5/minute")
-def get_all(request: Request, service: Service, params: Annotated[UserQueryParams, Query()]):
-    data = service.get_all(params.q, params.offset, params.limit, params.order_by)
-    return WrapperSchema(data=data)
+@serialized(WrapperSchema[list[UserReadSchema]])
+async def get_all(request: Request, service: Service, params: Annotated[UserQueryParams, Query()]):
+    try:
+        data = await service.get_all(
+            params.q, params.offset, params.limit, params.order_by, params.cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+
+    next_cursor = service.get_next_cursor(data, params.limit, params.order_by)
+    return WrapperSchema.model_construct(data=data, next_cursor=next_cursor)
 
 
 @router.get(
     "/{uid}",
     response_model=WrapperSchema[UserReadSchema],
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Get a user by uid.\n
@@ -70,10 +84,11 @@ def get_all(request: Request, service: Service, params: Annotated[UserQueryParam
     ),
 )
 @limiter.limit("5/minute")
-def get_by_uid(request: Request, service: Service, uid: str):
+@serialized(WrapperSchema[UserReadSchema])
+async def get_by_uid(request: Request, service: Service, uid: str):
     try:
-        data = service.get_by_uid(uid)
-        return WrapperSchema(data=data)
+        data = await service.get_by_uid(uid)
+        return WrapperSchema.model_construct(data=data)
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
 
@@ -81,7 +96,7 @@ def get_by_uid(request: Request, service: Service, uid: str):
 @router.get(
     "/{username}",
     response_model=WrapperSchema[UserReadSchema],
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Get a user by username.\n
@@ -91,10 +106,11 @@ def get_by_uid(request: Request, service: Service, uid: str):
     ),
 )
 @limiter.limit("5/minute")
-def get_by_username(request: Request, service: Service, username: str):
+@serialized(WrapperSchema[UserReadSchema])
+async def get_by_username(request: Request, service: Service, username: str):
     try:
-        data = service.get_by_username(username)
-        return WrapperSchema(data=data)
+        data = await service.get_by_username(username)
+        return WrapperSchema.model_construct(data=data)
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
 
@@ -103,36 +119,41 @@ def get_by_username(request: Request, service: Service, username: str):
     "/",
     response_model=WrapperSchema[UserReadSchema],
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Create a new user.\n
         - Admin user required.\n
+        - Answers 503 while the password hashing pool is full.\n
         - Limited to 5 requests per minute.
         """
     ),
 )
 @limiter.limit("5/minute")
-def create(
+async def create(
     request: Request,
     service: Service,
     create_schema: Annotated[UserCreateSchema, Body()],
     password_schema: Annotated[UserPasswordSchema, Body()],
 ):
     try:
-        data = service.create(create_schema, password=password_schema.password.get_secret_value())
+        data = await service.create(
+            create_schema, password=password_schema.password.get_secret_value()
+        )
         return WrapperSchema(data=data)
     except UsernameAlreadyExistsError as e:
         raise HTTPException(status_code=400, detail=str(e)) from None
     except EmailAlreadyExistsError as e:
         raise HTTPException(status_code=400, detail=str(e)) from None
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"}) from None
 
 
 @router.put(
     "/{username}",
     response_model=WrapperSchema[UserReadSchema],
     status_code=status.HTTP_202_ACCEPTED,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Update a user.\n
@@ -142,11 +163,11 @@ def create(
     ),
 )
 @limiter.limit("5/minute")
-def update(
+async def update(
     request: Request, service: Service, username: str, schema: Annotated[UserUpdateSchema, Body()]
 ):
     try:
-        data = service.update(username, schema)
+        data = await service.update(username, schema)
         return WrapperSchema(data=data)
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
@@ -160,24 +181,25 @@ def update(
     "/{username}/change-password",
     response_model=WrapperSchema[UserReadSchema],
     status_code=status.HTTP_202_ACCEPTED,
-    dependencies=[Depends(get_user)],
+    dependencies=[Depends(get_async_user)],
     description=(
         """
         Change a user's password.\n
         - User required.\n
+        - Answers 503 while the password hashing pool is full.\n
         - Limited to 5 requests per minute.
         """
     ),
 )
 @limiter.limit("5/minute")
-def change_password(
+async def change_password(
     request: Request,
     service: Service,
     username: str,
     schema: Annotated[UserChangePasswordSchema, Body()],
 ):
     try:
-        data = service.change_password(
+        data = await service.change_password(
             username, schema.old_password.get_secret_value(), schema.new_password.get_secret_value()
         )
         return WrapperSchema(data=data)
@@ -185,36 +207,41 @@ def change_password(
         raise HTTPException(status_code=404, detail=str(e)) from None
     except PasswordIncorrectError as e:
         raise HTTPException(status_code=400, detail=str(e)) from None
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"}) from None
 
 
 @router.put(
     "/{username}/reset-password",
     response_model=WrapperSchema[UserReadSchema],
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Reset a user's password.\n
         - Admin user required.\n
+        - Answers 503 while the password hashing pool is full.\n
         - Limited to 5 requests per minute.
         """
     ),
 )
 @limiter.limit("5/minute")
-def reset_password(
+async def reset_password(
     request: Request, service: Service, username: str, new_password: Annotated[SecretStr, Body()]
 ):
     try:
-        data = service.reset_password(username, new_password.get_secret_value())
+        data = await service.reset_password(username, new_password.get_secret_value())
         return WrapperSchema(data=data)
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"}) from None
 
 
 @router.put(
     "/{username}/change-role",
     response_model=WrapperSchema[UserReadSchema],
     status_code=status.HTTP_202_ACCEPTED,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Change a user's role.\n
@@ -224,9 +251,11 @@ def reset_password(
     ),
 )
 @limiter.limit("5/minute")
-def change_role(request: Request, service: Service, username: str, role: Annotated[Role, Body()]):
+async def change_role(
+    request: Request, service: Service, username: str, role: Annotated[Role, Body()]
+):
     try:
-        data = service.change_role(username, role)
+        data = await service.change_role(username, role)
         return WrapperSchema(data=data)
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
@@ -235,7 +264,7 @@ def change_role(request: Request, service: Service, username: str, role: Annotat
 @router.put(
     "/{username}/deactivate",
     response_model=WrapperSchema[UserReadSchema],
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Deactivate a user.\n
@@ -245,9 +274,9 @@ def change_role(request: Request, service: Service, username: str, role: Annotat
     ),
 )
 @limiter.limit("5/minute")
-def deactivate(request: Request, service: Service, username: str):
+async def deactivate(request: Request, service: Service, username: str):
     try:
-        data = service.deactivate(username)
+        data = await service.deactivate(username)
         return WrapperSchema(data=data)
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
@@ -256,7 +285,7 @@ def deactivate(request: Request, service: Service, username: str):
 @router.put(
     "/bulk/deactivate",
     response_model=WrapperSchema[list[UserReadSchema]],
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Deactivate multiple users.\n
@@ -266,9 +295,11 @@ def deactivate(request: Request, service: Service, username: str):
     ),
 )
 @limiter.limit("5/minute")
-def deactivate_bulk(request: Request, service: Service, usernames: Annotated[list[str], Body()]):
+async def deactivate_bulk(
+    request: Request, service: Service, usernames: Annotated[list[str], Body()]
+):
     try:
-        data = service.deactivate_bulk(usernames)
+        data = await service.deactivate_bulk(usernames)
         return WrapperSchema(data=data)
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
@@ -277,7 +308,7 @@ def deactivate_bulk(request: Request, service: Service, usernames: Annotated[lis
 @router.put(
     "/bulk/activate",
     response_model=WrapperSchema[list[UserReadSchema]],
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Activate multiple users.\n
@@ -287,9 +318,11 @@ def deactivate_bulk(request: Request, service: Service, usernames: Annotated[lis
     ),
 )
 @limiter.limit("5/minute")
-def activate_bulk(request: Request, service: Service, usernames: Annotated[list[str], Body()]):
+async def activate_bulk(
+    request: Request, service: Service, usernames: Annotated[list[str], Body()]
+):
     try:
-        data = service.activate_bulk(usernames)
+        data = await service.activate_bulk(usernames)
         return WrapperSchema(data=data)
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
@@ -298,7 +331,7 @@ def activate_bulk(request: Request, service: Service, usernames: Annotated[list[
 @router.put(
     "/{username}/activate",
     response_model=WrapperSchema[UserReadSchema],
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Activate a user.\n
@@ -308,9 +341,9 @@ def activate_bulk(request: Request, service: Service, usernames: Annotated[list[
     ),
 )
 @limiter.limit("5/minute")
-def activate(request: Request, service: Service, username: str):
+async def activate(request: Request, service: Service, username: str):
     try:
-        data = service.activate(username)
+        data = await service.activate(username)
         return WrapperSchema(data=data)
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
@@ -319,7 +352,7 @@ def activate(request: Request, service: Service, username: str):
 @router.delete(
     "/{username}",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Delete a user.\n
@@ -329,9 +362,9 @@ def activate(request: Request, service: Service, username: str):
     ),
 )
 @limiter.limit("5/minute")
-def delete(request: Request, service: Service, username: str):
+async def delete(request: Request, service: Service, username: str):
     try:
-        service.delete(username)
+        await service.delete(username)
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
 
@@ -339,7 +372,7 @@ def delete(request: Request, service: Service, username: str):
 @router.delete(
     "/bulk",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Delete multiple users.\n
@@ -349,9 +382,9 @@ def delete(request: Request, service: Service, username: str):
     ),
 )
 @limiter.limit("5/minute")
-def delete_bulk(request: Request, service: Service, usernames: Annotated[list[str], Body()]):
+async def delete_bulk(request: Request, service: Service, usernames: Annotated[list[str], Body()]):
     try:
-        service.delete_bulk(usernames)
+        await service.delete_bulk(usernames)
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from None
 
@@ -359,7 +392,7 @@ def delete_bulk(request: Request, service: Service, usernames: Annotated[list[st
 @router.delete(
     "/empty",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(get_admin_user)],
+    dependencies=[Depends(get_async_admin_user)],
     description=(
         """
         Delete all users.\n
@@ -369,5 +402,5 @@ def delete_bulk(request: Request, service: Service, usernames: Annotated[list[st
     ),
 )
 @limiter.limit("5/minute")
-def empty(request: Request, service: Service):
-    service.empty()
+async def empty(request: Request, service: Service):
+    await service.empty()
@@ -1,60 +1,158 @@
-from typing import Annotated
+from typing import Annotated, Any
 
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from operations.apps.users.models import UserDB
 from operations.core.config import Config, get_config
-from operations.core.db import get_db
+from operations.core.db import get_async_db, get_db
+
+from .principals import Principal, principals
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
 
 
-def get_current_user(
-    db: Annotated[Session, Depends(get_db)],
-    token: Annotated[str, Depends(oauth2_scheme)],
-    config: Annotated[Config, Depends(get_config)],
-) -> UserDB:
-    credentials_exception = HTTPException(
+def _get_credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _get_payload(token: str, config: Config) -> dict[str, Any]:
     try:
         payload = jwt.decode(token, config.secret_key, algorithms=[config.jwt_algorithm])
-        username = payload.get("sub")
 
-        if username is None:
-            raise credentials_exception
+        if payload.get("sub") is None:
+            raise _get_credentials_exception()
 
     except InvalidTokenError:
-        raise credentials_exception from None
+        raise _get_credentials_exception() from None
 
-    user = db.query(UserDB).filter(UserDB.username == username).first()
+    return payload
 
-    if user is None:
-        raise credentials_exception
 
-    return user
+def _get_username(token: str, config: Config) -> str:
+    return _get_payload(token, config)["sub"]
 
 
-def get_user(current_user: Annotated[UserDB, Depends(get_current_user)]):
-    if not current_user.is_active:
+def _check_user(user: Principal) -> Principal:
+    if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
+    return user
 
 
-def get_admin_user(current_user: Annotated[UserDB, Depends(get_current_user)]):
-    if current_user.role != "admin" or not current_user.is_active:
+def _check_admin_user(user: Principal) -> Principal:
+    if user.role != "admin" or not user.is_active:
         raise HTTPException(status_code=400, detail="Admin user required")
-    return current_user
+    return user
 
 
-def get_staff_user(current_user: Annotated[UserDB, Depends(get_current_user)]):
-    if current_user.role not in ["admin", "staff"] or not current_user.is_active:
+def _check_staff_user(user: Principal) -> Principal:
+    if user.role not in ["admin", "staff"] or not user.is_active:
         raise HTTPException(status_code=400, detail="Staff user required")
-    return current_user
+    return user
+
+
+def get_current_user(
+    db: Annotated[Session, Depends(get_db)],
+    token: Annotated[str, Depends(oauth2_scheme)],
+    config: Annotated[Config, Depends(get_config)],
+) -> UserDB:
+    username = _get_username(token, config)
+    user = db.query(UserDB).filter(UserDB.username == username).first()
+
+    if user is None:
+        raise _get_credentials_exception()
+
+    return user
+
+
+async def get_async_current_user(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    token: Annotated[str, Depends(oauth2_scheme)],
+    config: Annotated[Config, Depends(get_config)],
+) -> UserDB:
+    username = _get_username(token, config)
+    user = await db.scalar(select(UserDB).where(UserDB.username == username))
+
+    if user is None:
+        raise _get_credentials_exception()
+
+    return user
+
+
+def get_current_principal(
+    db: Annotated[Session, Depends(get_db)],
+    token: Annotated[str, Depends(oauth2_scheme)],
+    config: Annotated[Config, Depends(get_config)],
+) -> Principal:
+    principal = principals.get(token)
+
+    if principal is not None:
+        return principal
+
+    generation = principals.generation
+    payload = _get_payload(token, config)
+    user = db.query(UserDB).filter(UserDB.username == payload["sub"]).first()
+
+    if user is None:
+        raise _get_credentials_exception()
+
+    return principals.set(token, Principal.from_db(user), payload.get("exp"), generation)
+
+
+async def get_async_current_principal(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    token: Annotated[str, Depends(oauth2_scheme)],
+    config: Annotated[Config, Depends(get_config)],
+) -> Principal:
+    principal = principals.get(token)
+
+    if principal is not None:
+        return principal
+
+    generation = principals.generation
+    payload = _get_payload(token, config)
+    user = await db.scalar(select(UserDB).where(UserDB.username == payload["sub"]))
+
+    if user is None:
+        raise _get_credentials_exception()
+
+    return principals.set(token, Principal.from_db(user), payload.get("exp"), generation)
+
+
+def get_user(current_user: Annotated[Principal, Depends(get_current_principal)]):
+    return _check_user(current_user)
+
+
+def get_admin_user(current_user: Annotated[Principal, Depends(get_current_principal)]):
+    return _check_admin_user(current_user)
+
+
+def get_staff_user(current_user: Annotated[Principal, Depends(get_current_principal)]):
+    return _check_staff_user(current_user)
+
+
+async def get_async_user(
+    current_user: Annotated[Principal, Depends(get_async_current_principal)],
+):
+    return _check_user(current_user)
+
+
+async def get_async_admin_user(
+    current_user: Annotated[Principal, Depends(get_async_current_principal)],
+):
+    return _check_admin_user(current_user)
+
+
+async def get_async_staff_user(
+    current_user: Annotated[Principal, Depends(get_async_current_principal)],
+):
+    return _check_staff_user(current_user)
@@ -0,0 +1,139 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Self
+
+from operations.apps.users.models import Role, UserDB
+from operations.core.cache import CACHE_COUNTERS
+from operations.core.config import get_config
+from operations.core.metrics import collect_stats, metrics
+from operations.core.versions import ALL, versions
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    username: str
+    role: Role
+    is_active: bool
+
+    @classmethod
+    def from_db(cls, user: UserDB) -> Self:
+        return cls(username=user.username, role=user.role, is_active=user.is_active)
+
+
+@dataclass(frozen=True, slots=True)
+class PrincipalEntry:
+    principal: Principal
+    expires_at: float
+    token_expires_at: float | None
+
+
+class PrincipalCache:
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+
+        self._lock = Lock()
+        self._entries: OrderedDict[str, PrincipalEntry] = OrderedDict()
+        self._tokens: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token)
+        tokens = self._tokens.get(entry.principal.username)
+
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens[entry.principal.username]
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._tokens.clear()
+
+    def get(self, token: str) -> Principal | None:
+        with self._lock:
+            entry = self._entries.get(token)
+
+            if entry is not None and (
+                entry.expires_at <= time.monotonic()
+                or (entry.token_expires_at is not None and entry.token_expires_at <= time.time())
+            ):
+                self._remove(token)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry.principal
+
+    def set(
+        self, token: str, principal: Principal, token_expires_at: float | None, generation: int
+    ) -> Principal:
+        if self.max_size <= 0:
+            return principal
+
+        with self._lock:
+            # the user changed while it was being loaded, so the loaded row may be stale
+            if generation != self.generation:
+                return principal
+
+            if token in self._entries:
+                self._remove(token)
+
+            self._entries[token] = PrincipalEntry(
+                principal, time.monotonic() + self.ttl, token_expires_at
+            )
+            self._tokens.setdefault(principal.username, set()).add(token)
+
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+        return principal
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def invalidate(self, name: str) -> None:
+        table, separator, username = name.partition(":")
+
+        # every user write also bumps the row names, so the table version is not needed here
+        if table != UserDB.__tablename__ or not separator:
+            return
+
+        with self._lock:
+            self.generation += 1
+
+            if username == ALL:
+                self._clear()
+                return
+
+            for token in list(self._tokens.get(username, ())):
+                self._remove(token)
+
+
+principals = PrincipalCache(
+    max_size=get_config().principal_cache_max_size,
+    ttl=get_config().principal_cache_ttl,
+)
+versions.subscribe(principals.invalidate)
+metrics.register(
+    collect_stats("operations_cache", principals.stats, CACHE_COUNTERS, cache="principals")
+)
@@ -2,30 +2,44 @@ from datetime import UTC, datetime, timedelta
 from typing import Any
 
 import jwt
-from bcrypt import checkpw
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from operations.apps.users.models import UserDB
+from operations.core.executors import ExecutorSaturatedError, hashing_executor
+from operations.core.hashers import password_hashers
 
 
 class InvalidCredentialsError(Exception):
     pass
 
 
-class AuthenticationService:
-    def __init__(self, session: Session) -> None:
+class AsyncAuthenticationService:
+    def __init__(self, session: AsyncSession) -> None:
         self._db = session
 
-    def _verify_password(self, password: str, hashed_password: str) -> bool:
-        return checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+    async def _verify_password(self, password: str, hashed_password: str) -> bool:
+        return await hashing_executor.run(password_hashers.verify, password, hashed_password)
 
-    def authenticate_user(self, username: str, password: str) -> UserDB:
-        user = self._db.query(UserDB).filter(UserDB.username == username).first()
+    async def _rehash_password(self, user: UserDB, password: str) -> None:
+        try:
+            user.hash_password = await hashing_executor.run(password_hashers.hash, password)
+        except ExecutorSaturatedError:
+            # the password is already checked, so the upgrade waits for the next login
+            return
 
-        if user is None or not self._verify_password(password, user.hash_password):
+        await self._db.commit()
+
+    async def authenticate_user(self, username: str, password: str) -> UserDB:
+        user = await self._db.scalar(select(UserDB).where(UserDB.username == username))
+
+        if user is None or not await self._verify_password(password, user.hash_password):
             message = "Invalid credentials"
             raise InvalidCredentialsError(message)
 
+        if password_hashers.needs_rehash(user.hash_password):
+            await self._rehash_password(user, password)
+
         return user
 
     def create_access_token(
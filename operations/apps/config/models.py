@@ -1,6 +1,5 @@
 # ruff : noqa: UP045
 from decimal import Decimal
-from functools import cache
 from typing import Any, Optional, Self
 
 from sqlalchemy import ForeignKey
@@ -10,6 +9,7 @@ from syriantaxes import RoundingMethod
 from operations.apps.ss.models import SocialSecurityDB
 from operations.apps.tax.models import TaxDB
 from operations.core.db import Base
+from operations.core.versions import versions
 
 
 class TaxesCalculatorConfigDB(Base):
@@ -41,14 +41,13 @@ class TaxesCalculatorConfigDB(Base):
             if hasattr(obj, key) and value is not None:
                 setattr(obj, key, value)
 
+        versions.bump(session, cls.__tablename__)
         session.commit()
         session.refresh(obj)
-        cls.load.cache_clear()
 
         return obj
 
     @classmethod
-    @cache
     def load(cls, session: Session) -> Self:
         query = session.query(cls)
 
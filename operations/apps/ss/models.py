@@ -6,6 +6,7 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from syriantaxes import RoundingMethod
 
 from operations.core.db import Base
+from operations.core.search import search_indexes
 
 if TYPE_CHECKING:
     from operations.apps.config.models import TaxesCalculatorConfigDB
@@ -40,3 +41,6 @@ class SocialSecurityDB(Base):
             f" rounding_to_nearest={self.rounding_to_nearest}"
             ")>"
         )
+
+
+ss_search = search_indexes.add(SocialSecurityDB.__table__.c.name)
@@ -1,12 +1,25 @@
 from collections.abc import Iterable
 
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
 
-from .models import SocialSecurityDB
+from operations.core.pagination import Keyset
+from operations.core.versions import ALL, get_row_name, versions
+
+from .models import SocialSecurityDB, ss_search
 from .schemas import SSCreateSchema, SSUpdateSchema
 
 
+def _bump_versions(session: Session | AsyncSession, *ss_ids: object) -> None:
+    versions.bump(
+        session,
+        SocialSecurityDB.__tablename__,
+        *(get_row_name(SocialSecurityDB.__tablename__, ss_id) for ss_id in ss_ids),
+    )
+
+
 class SSNotFoundError(Exception):
     pass
 
@@ -24,7 +37,7 @@ class SocialSecurityService:
     ) -> list[SocialSecurityDB]:
         return (
             self._db.query(SocialSecurityDB)
-            .where(SocialSecurityDB.name.ilike(f"%{query}%"))
+            .where(ss_search.search(query))
             .order_by(*[text(field) for field in order_by])
             .offset(offset)
             .limit(limit)
@@ -40,6 +53,9 @@ class SocialSecurityService:
 
         return ss
 
+    def get_by_ids(self, ss_ids: Iterable[int]) -> list[SocialSecurityDB]:
+        return self._db.query(SocialSecurityDB).filter(SocialSecurityDB.id.in_(ss_ids)).all()
+
     def create(self, schema: SSCreateSchema) -> SocialSecurityDB:
         existing_ss = (
             self._db.query(SocialSecurityDB).filter(SocialSecurityDB.name == schema.name).first()
@@ -52,6 +68,8 @@ class SocialSecurityService:
         ss = SocialSecurityDB(**schema.model_dump())
 
         self._db.add(ss)
+        self._db.flush()
+        _bump_versions(self._db, ss.id)
         self._db.commit()
 
         return ss
@@ -61,7 +79,9 @@ class SocialSecurityService:
 
         if schema.name is not None:
             existing_ss = (
-                self._db.query(SocialSecurityDB).filter(SocialSecurityDB.name == schema.name).first()
+                self._db.query(SocialSecurityDB)
+                .filter(SocialSecurityDB.name == schema.name)
+                .first()
             )
 
             if existing_ss is not None and existing_ss.id != ss_id:
@@ -72,6 +92,7 @@ class SocialSecurityService:
             if value is not None:
                 setattr(ss, key, value)
 
+        _bump_versions(self._db, ss.id)
         self._db.commit()
         self._db.refresh(ss)
 
@@ -80,6 +101,7 @@ class SocialSecurityService:
     def delete(self, ss_id: int) -> None:
         ss = self.get_by_id(ss_id)
         self._db.delete(ss)
+        _bump_versions(self._db, ss_id)
         self._db.commit()
 
     def delete_bulk(self, ss_ids: set[int]) -> None:
@@ -90,8 +112,120 @@ class SocialSecurityService:
             raise SSNotFoundError(message)
 
         query.delete()
+        _bump_versions(self._db, *ss_ids)
         self._db.commit()
 
     def empty(self) -> None:
         self._db.query(SocialSecurityDB).delete()
+        _bump_versions(self._db, ALL)
         self._db.commit()
+
+
+class AsyncSocialSecurityService:
+    def __init__(self, session: AsyncSession, read_session: AsyncSession | None = None) -> None:
+        self._db = session
+        self._read_db = session if read_session is None else read_session
+
+    async def _get_by_name(self, name: str) -> SocialSecurityDB | None:
+        return await self._db.scalar(select(SocialSecurityDB).where(SocialSecurityDB.name == name))
+
+    async def get_all(  # noqa: PLR0913
+        self,
+        query: str,
+        offset: int,
+        limit: int,
+        order_by: Iterable[str],
+        cursor: str | None = None,
+    ) -> list[SocialSecurityDB]:
+        keyset = Keyset(SocialSecurityDB.__table__, order_by)
+        result = await self._read_db.scalars(
+            select(SocialSecurityDB)
+            .where(ss_search.search(query), keyset.after(cursor))
+            .order_by(*keyset.order_by())
+            .offset(offset)
+            .limit(limit)
+        )
+        return list(result.all())
+
+    def get_next_cursor(
+        self, items: list[SocialSecurityDB], limit: int, order_by: Iterable[str]
+    ) -> str | None:
+        return Keyset(SocialSecurityDB.__table__, order_by).get_next_cursor(items, limit)
+
+    async def get_by_id(self, ss_id: int) -> SocialSecurityDB:
+        ss = await self._db.scalar(select(SocialSecurityDB).where(SocialSecurityDB.id == ss_id))
+
+        if ss is None:
+            message = f"Social Security with id '{ss_id}' not found"
+            raise SSNotFoundError(message)
+
+        return ss
+
+    async def get_by_ids(self, ss_ids: Iterable[int]) -> list[SocialSecurityDB]:
+        result = await self._db.scalars(
+            select(SocialSecurityDB).where(SocialSecurityDB.id.in_(ss_ids))
+        )
+        return list(result.all())
+
+    async def create(self, schema: SSCreateSchema) -> SocialSecurityDB:
+        existing_ss = await self._get_by_name(schema.name)
+
+        if existing_ss is not None:
+            message = f"Social Security with name '{schema.name}' already exists"
+            raise SSAlreadyExistsError(message)
+
+        ss = SocialSecurityDB(**schema.model_dump())
+
+        self._db.add(ss)
+        await self._db.flush()
+        _bump_versions(self._db, ss.id)
+        await self._db.commit()
+        await self._db.refresh(ss)
+
+        return ss
+
+    async def update(self, ss_id: int, schema: SSUpdateSchema) -> SocialSecurityDB:
+        ss = await self.get_by_id(ss_id)
+
+        if schema.name is not None:
+            existing_ss = await self._get_by_name(schema.name)
+
+            if existing_ss is not None and existing_ss.id != ss_id:
+                message = f"Social Security with name '{schema.name}' already exists"
+                raise SSAlreadyExistsError(message)
+
+        for key, value in schema.model_dump().items():
+            if value is not None:
+                setattr(ss, key, value)
+
+        _bump_versions(self._db, ss.id)
+        await self._db.commit()
+        await self._db.refresh(ss)
+
+        return ss
+
+    async def delete(self, ss_id: int) -> None:
+        ss = await self.get_by_id(ss_id)
+        await self._db.delete(ss)
+        _bump_versions(self._db, ss_id)
+        await self._db.commit()
+
+    async def delete_bulk(self, ss_ids: set[int]) -> None:
+        count = await self._db.scalar(
+            select(func.count())
+            .select_from(SocialSecurityDB)
+            .where(SocialSecurityDB.id.in_(ss_ids))
+        )
+
+        if len(ss_ids) != count:
+            message = f"Some Social Security with id '{ss_ids}' not found"
+            raise SSNotFoundError(message)
+
+        await self._db.execute(delete(SocialSecurityDB).where(SocialSecurityDB.id.in_(ss_ids)))
+        _bump_versions(self._db, *ss_ids)
+        await self._db.commit()
+
+    async def empty(self) -> None:
+        await self._db.execute(delete(SocialSecurityDB))
+        _bump_versions(self._db, ALL)
+        await self._db.commit()
@@ -0,0 +1,121 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Self
+
+from syriantaxes import Rounder, SocialSecurity
+
+from .models import TaxDB
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTax:
+    id: int
+    min_allowed_salary: Decimal
+    fixed_tax_rate: Decimal
+    compensation_rate: Decimal
+
+    mins: tuple[Decimal, ...]
+    maxs: tuple[Decimal, ...]
+    rates: tuple[Decimal, ...]
+    cumulative: tuple[Decimal, ...]
+    net_maxs: tuple[Decimal, ...]
+    total: Decimal
+    max_rate: Decimal
+    ordered: bool
+
+    @classmethod
+    def from_db(cls, tax: TaxDB) -> Self:
+        brackets = [(bracket.min, bracket.max, bracket.rate) for bracket in tax.brackets]
+
+        cumulative = []
+        net_maxs = []
+        total = Decimal(0)
+
+        for bracket_min, bracket_max, bracket_rate in brackets:
+            cumulative.append(total)
+            total += (bracket_max - bracket_min) * bracket_rate
+            net_maxs.append(bracket_max - total)
+
+        ordered = all(
+            previous[1] <= current[0]
+            for previous, current in zip(brackets, brackets[1:], strict=False)
+        )
+
+        return cls(
+            id=tax.id,
+            min_allowed_salary=tax.min_allowed_salary,
+            fixed_tax_rate=tax.fixed_tax_rate,
+            compensation_rate=tax.compensation_rate,
+            mins=tuple(bracket[0] for bracket in brackets),
+            maxs=tuple(bracket[1] for bracket in brackets),
+            rates=tuple(bracket[2] for bracket in brackets),
+            cumulative=tuple(cumulative),
+            net_maxs=tuple(net_maxs),
+            total=total,
+            max_rate=max((bracket[2] for bracket in brackets), default=Decimal(0)),
+            ordered=ordered,
+        )
+
+    def _find_bracket(self, amount: Decimal) -> int | None:
+        if self.ordered:
+            index = bisect_left(self.maxs, amount)
+
+            if index < len(self.maxs) and self.mins[index] <= amount:
+                return index
+
+            return None
+
+        for index, (bracket_min, bracket_max) in enumerate(zip(self.mins, self.maxs, strict=True)):
+            if bracket_min <= amount <= bracket_max:
+                return index
+
+        return None
+
+    def calculate_brackets_tax(
+        self,
+        amount: Decimal,
+        rounder: Rounder | None = None,
+        ss_obj: SocialSecurity | None = None,
+        ss_salary: Decimal | None = None,
+    ) -> Decimal:
+        if ss_obj is not None:
+            taxable_salary = amount - ss_obj.calculate_deduction(ss_salary or amount)
+        else:
+            taxable_salary = amount
+
+        index = self._find_bracket(taxable_salary)
+
+        if index is None:
+            return self.total
+
+        tax = self.cumulative[index] + self.rates[index] * (taxable_salary - self.mins[index])
+
+        if rounder is not None:
+            return rounder.round(tax)
+
+        return tax
+
+    def _find_net_bracket(self, net: Decimal) -> int | None:
+        if self.ordered:
+            index = bisect_left(self.net_maxs, net)
+
+            if index < len(self.net_maxs) and self.mins[index] - self.cumulative[index] <= net:
+                return index
+
+            return None
+
+        for index, net_max in enumerate(self.net_maxs):
+            if self.mins[index] - self.cumulative[index] <= net <= net_max:
+                return index
+
+        return None
+
+    def invert_brackets_tax(self, net: Decimal) -> Decimal:
+        index = self._find_net_bracket(net)
+
+        if index is None:
+            return net + self.total
+
+        net_min = self.mins[index] - self.cumulative[index]
+        return self.mins[index] + (net - net_min) / (1 - self.rates[index])
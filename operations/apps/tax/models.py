@@ -6,6 +6,7 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from syriantaxes import RoundingMethod
 
 from operations.core.db import Base
+from operations.core.search import search_indexes
 
 if TYPE_CHECKING:
     from operations.apps.config.models import TaxesCalculatorConfigDB
@@ -61,3 +62,6 @@ class BracketDB(Base):
 
     def __repr__(self) -> str:
         return f"<BracketDB(id={self.id}, min={self.min}, max={self.max}, rate={self.rate})>"
+
+
+tax_search = search_indexes.add(TaxDB.__table__.c.name)
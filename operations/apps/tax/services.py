@@ -1,12 +1,25 @@
 from collections.abc import Iterable
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.sql import text
 
-from .models import BracketDB, TaxDB
+from operations.core.pagination import Keyset
+from operations.core.versions import ALL, get_row_name, versions
+
+from .models import BracketDB, TaxDB, tax_search
 from .schemas import TaxCreateSchema, TaxUpdateSchema
 
 
+def _bump_versions(session: Session | AsyncSession, *tax_ids: object) -> None:
+    versions.bump(
+        session,
+        TaxDB.__tablename__,
+        *(get_row_name(TaxDB.__tablename__, tax_id) for tax_id in tax_ids),
+    )
+
+
 class TaxNotFoundError(Exception):
     pass
 
@@ -22,7 +35,7 @@ class TaxService:
     def get_all(self, query: str, offset: int, limit: int, order_by: Iterable[str]) -> list[TaxDB]:
         return (
             self._db.query(TaxDB)
-            .where(TaxDB.name.ilike(f"%{query}%"))
+            .where(tax_search.search(query))
             .order_by(*[text(field) for field in order_by])
             .offset(offset)
             .limit(limit)
@@ -38,6 +51,9 @@ class TaxService:
 
         return tax
 
+    def get_by_ids(self, tax_ids: Iterable[int]) -> list[TaxDB]:
+        return self._db.query(TaxDB).filter(TaxDB.id.in_(tax_ids)).all()
+
     def create(self, schema: TaxCreateSchema) -> TaxDB:
         existing_tax = self._db.query(TaxDB).filter(TaxDB.name == schema.name).first()
 
@@ -60,6 +76,7 @@ class TaxService:
             )
             self._db.add(bracket_db)
 
+        _bump_versions(self._db, tax.id)
         self._db.commit()
         self._db.refresh(tax)
 
@@ -84,6 +101,7 @@ class TaxService:
                 )
                 self._db.add(bracket_db)
 
+        _bump_versions(self._db, tax.id)
         self._db.commit()
         self._db.refresh(tax)
 
@@ -98,6 +116,7 @@ class TaxService:
         self._delete_brackets(tax.id)
         self._db.delete(tax)
 
+        _bump_versions(self._db, tax_id)
         self._db.commit()
 
     def delete_bulk(self, tax_ids: set[int]) -> None:
@@ -110,8 +129,149 @@ class TaxService:
         self._db.query(BracketDB).filter(BracketDB.tax_id.in_(tax_ids)).delete()
         query.delete()
 
+        _bump_versions(self._db, *tax_ids)
         self._db.commit()
 
     def empty(self) -> None:
         self._db.query(BracketDB).delete()
         self._db.query(TaxDB).delete()
+        _bump_versions(self._db, ALL)
+        self._db.commit()
+
+
+class AsyncTaxService:
+    def __init__(self, session: AsyncSession, read_session: AsyncSession | None = None) -> None:
+        self._db = session
+        self._read_db = session if read_session is None else read_session
+
+    async def _first(self, statement: Select[tuple[TaxDB]]) -> TaxDB | None:
+        result = await self._db.scalars(statement)
+        return result.unique().first()
+
+    async def get_all(  # noqa: PLR0913
+        self,
+        query: str,
+        offset: int,
+        limit: int,
+        order_by: Iterable[str],
+        cursor: str | None = None,
+    ) -> list[TaxDB]:
+        keyset = Keyset(TaxDB.__table__, order_by)
+        result = await self._read_db.scalars(
+            select(TaxDB)
+            .options(selectinload(TaxDB.brackets))
+            .where(tax_search.search(query), keyset.after(cursor))
+            .order_by(*keyset.order_by())
+            .offset(offset)
+            .limit(limit)
+        )
+        return list(result.unique().all())
+
+    def get_next_cursor(
+        self, items: list[TaxDB], limit: int, order_by: Iterable[str]
+    ) -> str | None:
+        return Keyset(TaxDB.__table__, order_by).get_next_cursor(items, limit)
+
+    async def get_by_id(self, tax_id: int) -> TaxDB:
+        tax = await self._first(select(TaxDB).where(TaxDB.id == tax_id))
+
+        if tax is None:
+            message = f"Tax with id '{tax_id}' not found"
+            raise TaxNotFoundError(message)
+
+        return tax
+
+    async def get_by_ids(self, tax_ids: Iterable[int]) -> list[TaxDB]:
+        result = await self._db.scalars(select(TaxDB).where(TaxDB.id.in_(tax_ids)))
+        return list(result.unique().all())
+
+    async def create(self, schema: TaxCreateSchema) -> TaxDB:
+        existing_tax = await self._first(select(TaxDB).where(TaxDB.name == schema.name))
+
+        if existing_tax is not None:
+            message = f"Tax with name '{schema.name}' already exists"
+            raise TaxAlreadyExistsError(message)
+
+        tax_dict = schema.model_dump()
+        tax_dict.pop("brackets")
+
+        tax = TaxDB(**tax_dict)
+
+        self._db.add(tax)
+        await self._db.flush()
+
+        for bracket in schema.brackets:
+            bracket_db = BracketDB(
+                tax_id=tax.id, min=bracket.min, max=bracket.max, rate=bracket.rate
+            )
+            self._db.add(bracket_db)
+
+        _bump_versions(self._db, tax.id)
+        await self._db.commit()
+        await self._refresh(tax)
+
+        return tax
+
+    async def update(self, tax_id: int, schema: TaxUpdateSchema) -> TaxDB:
+        tax = await self.get_by_id(tax_id)
+
+        tax_dict = schema.model_dump()
+        tax_dict.pop("brackets")
+
+        for key, value in tax_dict.items():
+            if value is not None:
+                setattr(tax, key, value)
+
+        if schema.brackets is not None:
+            await self._delete_brackets(tax.id)
+
+            for bracket in schema.brackets:
+                bracket_db = BracketDB(
+                    tax_id=tax.id, min=bracket.min, max=bracket.max, rate=bracket.rate
+                )
+                self._db.add(bracket_db)
+
+        _bump_versions(self._db, tax.id)
+        await self._db.commit()
+        await self._refresh(tax)
+
+        return tax
+
+    async def _refresh(self, tax: TaxDB) -> None:
+        # the session doesn't expire on commit, so the brackets added here would otherwise keep
+        # the request values instead of what the database stored
+        self._db.expire_all()
+        await self._db.refresh(tax)
+
+    async def _delete_brackets(self, tax_id: int) -> None:
+        await self._db.execute(delete(BracketDB).where(BracketDB.tax_id == tax_id))
+
+    async def delete(self, tax_id: int) -> None:
+        tax = await self.get_by_id(tax_id)
+
+        await self._delete_brackets(tax.id)
+        await self._db.delete(tax)
+
+        _bump_versions(self._db, tax_id)
+        await self._db.commit()
+
+    async def delete_bulk(self, tax_ids: set[int]) -> None:
+        count = await self._db.scalar(
+            select(func.count()).select_from(TaxDB).where(TaxDB.id.in_(tax_ids))
+        )
+
+        if len(tax_ids) != count:
+            message = f"Some Tax with id '{tax_ids}' not found"
+            raise TaxNotFoundError(message)
+
+        await self._db.execute(delete(BracketDB).where(BracketDB.tax_id.in_(tax_ids)))
+        await self._db.execute(delete(TaxDB).where(TaxDB.id.in_(tax_ids)))
+
+        _bump_versions(self._db, *tax_ids)
+        await self._db.commit()
+
+    async def empty(self) -> None:
+        await self._db.execute(delete(BracketDB))
+        await self._db.execute(delete(TaxDB))
+        _bump_versions(self._db, ALL)
+        await self._db.commit()
@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from threading import Lock
+from typing import Self
+
+from sqlalchemy.orm import Session
+from syriantaxes import Rounder, SocialSecurity
+
+from operations.apps.config.models import TaxesCalculatorConfigDB
+from operations.apps.ss.models import SocialSecurityDB
+from operations.apps.tax.compiled import CompiledTax
+from operations.apps.tax.models import TaxDB
+from operations.core.versions import versions
+
+from .vectorized import VectorizedTaxesCalculator, VectorRounder
+
+CONTEXT_TABLES = (
+    TaxesCalculatorConfigDB.__tablename__,
+    TaxDB.__tablename__,
+    SocialSecurityDB.__tablename__,
+)
+
+
+def get_ss_obj(ss_db_obj: SocialSecurityDB, rounder: Rounder) -> SocialSecurity:
+    return SocialSecurity(
+        min_salary=ss_db_obj.min_allowed_salary,
+        deduction_rate=ss_db_obj.deduction_rate,
+        rounder=rounder,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class CalculatorContext:
+    version: tuple[int, ...]
+    tax_rounder: Rounder
+    ss_rounder: Rounder
+    tax_vector_rounder: VectorRounder
+    ss_vector_rounder: VectorRounder
+    default_tax: CompiledTax | None
+    default_ss: SocialSecurity | None
+
+    @classmethod
+    def from_config(cls, version: tuple[int, ...], config: TaxesCalculatorConfigDB) -> Self:
+        tax_rounder = Rounder(
+            method=config.tax_rounding_method,
+            to_nearest=config.tax_rounding_to_nearest,
+        )
+        ss_rounder = Rounder(
+            method=config.ss_rounding_method,
+            to_nearest=config.ss_rounding_to_nearest,
+        )
+
+        default_tax = None
+        default_ss = None
+
+        if config.default_tax is not None:
+            default_tax = CompiledTax.from_db(config.default_tax)
+
+        if config.default_ss is not None:
+            default_ss = get_ss_obj(config.default_ss, ss_rounder)
+
+        return cls(
+            version=version,
+            tax_rounder=tax_rounder,
+            ss_rounder=ss_rounder,
+            tax_vector_rounder=VectorRounder(
+                config.tax_rounding_method, config.tax_rounding_to_nearest
+            ),
+            ss_vector_rounder=VectorRounder(
+                config.ss_rounding_method, config.ss_rounding_to_nearest
+            ),
+            default_tax=default_tax,
+            default_ss=default_ss,
+        )
+
+
+class CalculatorContextCache:
+    def __init__(self, context: CalculatorContext) -> None:
+        self.context = context
+        self.taxes: dict[int, CompiledTax] = {}
+        self.social_securities: dict[int, SocialSecurity] = {}
+        self.vectorized: dict[tuple[int, Decimal, Decimal], VectorizedTaxesCalculator | None] = {}
+
+    def add_tax(self, tax: TaxDB) -> CompiledTax:
+        return self.taxes.setdefault(tax.id, CompiledTax.from_db(tax))
+
+    def add_ss(self, ss_db_obj: SocialSecurityDB) -> SocialSecurity:
+        return self.social_securities.setdefault(
+            ss_db_obj.id, get_ss_obj(ss_db_obj, self.context.ss_rounder)
+        )
+
+    def get_vectorized(
+        self, tax: CompiledTax, ss: SocialSecurity
+    ) -> VectorizedTaxesCalculator | None:
+        key = (tax.id, ss.min_salary, ss.deduction_rate)
+
+        if key in self.vectorized:
+            return self.vectorized[key]
+
+        try:
+            calculator = VectorizedTaxesCalculator(
+                tax=tax,
+                rounder=self.context.tax_vector_rounder,
+                ss_min_salary=ss.min_salary,
+                ss_deduction_rate=ss.deduction_rate,
+                ss_rounder=self.context.ss_vector_rounder,
+            )
+        except ValueError:
+            # unsorted brackets or amounts finer than a cent stay on the Decimal path
+            calculator = None
+
+        return self.vectorized.setdefault(key, calculator)
+
+
+class CalculatorContextRegistry:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._context: CalculatorContext | None = None
+        self._cache: CalculatorContextCache | None = None
+
+    def get(self, session: Session) -> CalculatorContext:
+        version = versions.get(*CONTEXT_TABLES)
+        context = self._context
+
+        if context is not None and context.version == version:
+            return context
+
+        with self._lock:
+            context = self._context
+
+            if context is None or context.version != version:
+                config = TaxesCalculatorConfigDB.load(session)
+                context = CalculatorContext.from_config(version, config)
+                self._cache = CalculatorContextCache(context)
+                self._context = context
+
+        return context
+
+    def get_cache(self, context: CalculatorContext) -> CalculatorContextCache:
+        cache = self._cache
+
+        # requests still holding an older snapshot fill a cache of their own
+        if cache is None or cache.context is not context:
+            return CalculatorContextCache(context)
+
+        return cache
+
+
+calculator_contexts = CalculatorContextRegistry()
@@ -60,3 +60,18 @@ class GrossInSchema(BaseModel):
     ss_salary: Decimal | None = None
     tax_id: int | None = None
     ss_id: int | None = None
+
+
+class NetInSchema(BaseModel):
+    net: Annotated[Decimal, Field(gt=0, examples=[900_000])]
+    compensation: Decimal = Field(Decimal(0), examples=[500_000])
+
+    ss_salary: Annotated[Decimal, Field(gt=0)] | None = None
+    tax_id: int | None = None
+    ss_id: int | None = None
+
+
+class GrossBatchRowOutSchema(BaseModel):
+    index: int
+    result: SalaryOutSchema | None = None
+    error: str | None = None
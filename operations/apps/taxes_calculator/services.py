@@ -1,10 +1,174 @@
-from decimal import Decimal
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
 
-from syriantaxes import Rounder, SocialSecurity, calculate_brackets_tax, calculate_fixed_tax
+from fastapi.concurrency import run_in_threadpool
+from syriantaxes import Rounder, SocialSecurity, calculate_fixed_tax
 
-from operations.apps.tax.models import TaxDB
+from operations.apps.ss.services import SocialSecurityService, SSNotFoundError
+from operations.apps.tax.compiled import CompiledTax
+from operations.apps.tax.services import TaxNotFoundError, TaxService
+from operations.core.cache import CACHE_COUNTERS, ResponseCache
+from operations.core.config import get_config
+from operations.core.metrics import collect_stats, metrics
+from operations.core.profiling import profiler
+from operations.core.versions import versions
 
-from .schemas import DeductionOutSchema, GrossOutSchema, SalaryOutSchema, TaxOutSchema
+from .context import CONTEXT_TABLES, CalculatorContext, CalculatorContextCache
+from .schemas import (
+    DeductionOutSchema,
+    GrossBatchRowOutSchema,
+    GrossInSchema,
+    GrossOutSchema,
+    SalaryOutSchema,
+    TaxOutSchema,
+)
+from .streaming import GrossStreamCodec, iter_lines
+from .vectorized import VectorizedTaxesCalculator, from_units
+
+calculator_cache = ResponseCache(
+    max_bytes=get_config().calculator_cache_max_bytes,
+    ttl=get_config().calculator_cache_ttl,
+)
+versions.subscribe(calculator_cache.invalidate)
+metrics.register(
+    collect_stats("operations_cache", calculator_cache.stats, CACHE_COUNTERS, cache="calculator")
+)
+metrics.describe(
+    "operations_calculator_rows_total", "counter", "Rows calculated by batch and stream"
+)
+metrics.describe(
+    "operations_calculator_seconds_total",
+    "counter",
+    "Seconds spent calculating batch and stream rows",
+)
+
+
+def record_rows(mode: str, rows: int, started_at: float) -> None:
+    labels = (("mode", mode),)
+    metrics.inc("operations_calculator_rows_total", labels, rows)
+    metrics.inc("operations_calculator_seconds_total", labels, time.perf_counter() - started_at)
+
+
+def get_result_key(  # noqa: PLR0913
+    name: str,
+    version: tuple[int, ...],
+    tax: CompiledTax,
+    rounder: Rounder,
+    ss: SocialSecurity,
+    *amounts: Decimal | None,
+) -> str:
+    # the context version covers the rounding methods, the default tax and ss and every tax
+    # and ss row, so equal keys always give equal results
+    return "|".join(
+        (
+            name,
+            "-".join(str(number) for number in version),
+            str(tax.id),
+            str(rounder.to_nearest),
+            str(ss.min_salary),
+            str(ss.deduction_rate),
+            *(str(amount) for amount in amounts),
+        )
+    )
+
+
+class DefaultTaxNotSetError(Exception):
+    pass
+
+
+class DefaultSSNotSetError(Exception):
+    pass
+
+
+class TaxesCalculatorResolver:
+    def __init__(
+        self,
+        tax_service: TaxService | None,
+        ss_service: SocialSecurityService | None,
+        cache: CalculatorContextCache,
+    ) -> None:
+        self._tax_service = tax_service
+        self._ss_service = ss_service
+        self._cache = cache
+        self._context = cache.context
+
+        self._missing_taxes: set[int] = set()
+        self._missing_ss: set[int] = set()
+
+    @property
+    def context(self) -> CalculatorContext:
+        return self._context
+
+    @property
+    def cache(self) -> CalculatorContextCache:
+        return self._cache
+
+    def prefetch(self, tax_ids: Iterable[int | None], ss_ids: Iterable[int | None]) -> None:
+        tax_ids = {tax_id for tax_id in tax_ids if tax_id is not None}
+        tax_ids -= self._cache.taxes.keys() | self._missing_taxes
+        ss_ids = {ss_id for ss_id in ss_ids if ss_id is not None}
+        ss_ids -= self._cache.social_securities.keys() | self._missing_ss
+
+        if tax_ids:
+            if self._tax_service is not None:
+                for tax in self._tax_service.get_by_ids(tax_ids):
+                    self._cache.add_tax(tax)
+            self._missing_taxes |= tax_ids - self._cache.taxes.keys()
+
+        if ss_ids:
+            if self._ss_service is not None:
+                for ss_db_obj in self._ss_service.get_by_ids(ss_ids):
+                    self._cache.add_ss(ss_db_obj)
+            self._missing_ss |= ss_ids - self._cache.social_securities.keys()
+
+    def get_tax(self, tax_id: int | None = None) -> CompiledTax:
+        if tax_id is None:
+            if self._context.default_tax is None:
+                message = "No tax id provided and no default tax id set"
+                raise DefaultTaxNotSetError(message)
+            return self._context.default_tax
+
+        if tax_id in self._missing_taxes or (
+            self._tax_service is None and tax_id not in self._cache.taxes
+        ):
+            message = f"Tax with id '{tax_id}' not found"
+            raise TaxNotFoundError(message)
+
+        compiled_tax = self._cache.taxes.get(tax_id)
+
+        if compiled_tax is None:
+            try:
+                compiled_tax = self._cache.add_tax(self._tax_service.get_by_id(tax_id))
+            except TaxNotFoundError:
+                self._missing_taxes.add(tax_id)
+                raise
+
+        return compiled_tax
+
+    def get_ss(self, ss_id: int | None = None) -> SocialSecurity:
+        if ss_id is None:
+            if self._context.default_ss is None:
+                message = "No ss id provided and no default ss id set"
+                raise DefaultSSNotSetError(message)
+            return self._context.default_ss
+
+        if ss_id in self._missing_ss or (
+            self._ss_service is None and ss_id not in self._cache.social_securities
+        ):
+            message = f"Social Security with id '{ss_id}' not found"
+            raise SSNotFoundError(message)
+
+        ss = self._cache.social_securities.get(ss_id)
+
+        if ss is None:
+            try:
+                ss = self._cache.add_ss(self._ss_service.get_by_id(ss_id))
+            except SSNotFoundError:
+                self._missing_ss.add(ss_id)
+                raise
+
+        return ss
 
 
 class TaxesCalculatorService:
@@ -14,7 +178,7 @@ class TaxesCalculatorService:
         gross_compensation: Decimal,
         brackets_tax: Decimal,
         fixed_tax: Decimal,
-        ss_salary: Decimal,
+        ss_salary: Decimal = Decimal(0),
     ) -> SalaryOutSchema:
         return SalaryOutSchema(
             gross=GrossOutSchema(
@@ -31,15 +195,13 @@ class TaxesCalculatorService:
         self,
         salary: Decimal,
         compensation: Decimal,
-        tax: TaxDB,
+        tax: CompiledTax,
         rounder: Rounder,
         ss: SocialSecurity,
         ss_salary: Decimal | None = None,
     ) -> SalaryOutSchema:
         kwargs = {
             "amount": salary,
-            "brackets": tax.brackets,
-            "min_allowed_salary": tax.min_allowed_salary,
             "rounder": rounder,
         }
 
@@ -47,7 +209,7 @@ class TaxesCalculatorService:
             kwargs["ss_obj"] = ss
             kwargs["ss_salary"] = ss_salary
 
-        brackets = calculate_brackets_tax(**kwargs)
+        brackets = tax.calculate_brackets_tax(**kwargs)
 
         fixed_tax = calculate_fixed_tax(
             amount=compensation, fixed_tax_rate=tax.fixed_tax_rate, rounder=rounder
@@ -64,3 +226,300 @@ class TaxesCalculatorService:
             schema_kwargs["ss_salary"] = ss.calculate_deduction(ss_salary)
 
         return self._get_salary_schema(**schema_kwargs)
+
+    def calculate_net(  # noqa: PLR0913
+        self,
+        net: Decimal,
+        compensation: Decimal,
+        tax: CompiledTax,
+        rounder: Rounder,
+        ss: SocialSecurity,
+        ss_salary: Decimal | None = None,
+    ) -> SalaryOutSchema:
+        if tax.max_rate >= 1:
+            message = "Can't calculate the gross salary for a tax with a bracket rate of 100%"
+            raise ValueError(message)
+
+        fixed_tax = calculate_fixed_tax(
+            amount=compensation, fixed_tax_rate=tax.fixed_tax_rate, rounder=rounder
+        )
+        ss_deduction = Decimal(0) if ss_salary is None else ss.calculate_deduction(ss_salary)
+
+        # gross salary = base + brackets tax, and the taxable salary is gross salary - ss deduction
+        base = net - compensation + fixed_tax + ss_deduction
+
+        if base <= 0:
+            message = f"Net must be greater than {compensation - fixed_tax - ss_deduction}"
+            raise ValueError(message)
+
+        taxable_net = base - ss_deduction
+        brackets_tax = tax.invert_brackets_tax(taxable_net) - taxable_net
+
+        # any rounded brackets tax that solves the equation is within this window of the
+        # unrounded solution, so only a few rounding levels need to be checked
+        to_nearest = rounder.to_nearest
+        window = to_nearest + to_nearest / (1 - tax.max_rate)
+        first = ((brackets_tax - window) / to_nearest).to_integral_value(ROUND_FLOOR)
+        last = ((brackets_tax + window) / to_nearest).to_integral_value(ROUND_CEILING)
+
+        candidates = [level * to_nearest for level in range(int(first), int(last) + 1)]
+        candidates.append(tax.total)
+
+        kwargs = {"rounder": rounder}
+
+        if ss_salary is not None:
+            kwargs["ss_obj"] = ss
+            kwargs["ss_salary"] = ss_salary
+
+        salaries = [
+            base + candidate
+            for candidate in sorted(candidates)
+            if base + candidate > 0
+            and tax.calculate_brackets_tax(amount=base + candidate, **kwargs) == candidate
+        ]
+
+        if not salaries:
+            message = f"No gross salary gives a net of {net}"
+            raise ValueError(message)
+
+        return self.calculate_gross(
+            salary=min(salaries),
+            compensation=compensation,
+            tax=tax,
+            rounder=rounder,
+            ss=ss,
+            ss_salary=ss_salary,
+        )
+
+    def _get_cached(
+        self, key: str, version: tuple[int, ...], calculate: Callable[[], SalaryOutSchema]
+    ) -> bytes:
+        body = calculator_cache.get(key)
+
+        if body is None:
+            body = calculate().model_dump_json().encode("utf-8")
+            calculator_cache.set(key, body, CONTEXT_TABLES, version)
+
+        return body
+
+    def calculate_gross_json(  # noqa: PLR0913
+        self,
+        version: tuple[int, ...],
+        salary: Decimal,
+        compensation: Decimal,
+        tax: CompiledTax,
+        rounder: Rounder,
+        ss: SocialSecurity,
+        ss_salary: Decimal | None = None,
+    ) -> bytes:
+        key = get_result_key("gross", version, tax, rounder, ss, salary, compensation, ss_salary)
+        return self._get_cached(
+            key,
+            version,
+            lambda: self.calculate_gross(salary, compensation, tax, rounder, ss, ss_salary),
+        )
+
+    def calculate_net_json(  # noqa: PLR0913
+        self,
+        version: tuple[int, ...],
+        net: Decimal,
+        compensation: Decimal,
+        tax: CompiledTax,
+        rounder: Rounder,
+        ss: SocialSecurity,
+        ss_salary: Decimal | None = None,
+    ) -> bytes:
+        key = get_result_key("net", version, tax, rounder, ss, net, compensation, ss_salary)
+        return self._get_cached(
+            key,
+            version,
+            lambda: self.calculate_net(net, compensation, tax, rounder, ss, ss_salary),
+        )
+
+    def _calculate_row(
+        self,
+        index: int,
+        row: GrossInSchema,
+        resolver: TaxesCalculatorResolver,
+        rounder: Rounder,
+    ) -> GrossBatchRowOutSchema:
+        try:
+            result = self.calculate_gross(
+                salary=row.salary,
+                compensation=row.compensation,
+                tax=resolver.get_tax(row.tax_id),
+                rounder=rounder,
+                ss=resolver.get_ss(row.ss_id),
+                ss_salary=row.ss_salary,
+            )
+        except (
+            ValueError,
+            TaxNotFoundError,
+            SSNotFoundError,
+            DefaultTaxNotSetError,
+            DefaultSSNotSetError,
+        ) as e:
+            return GrossBatchRowOutSchema(index=index, error=str(e))
+
+        return GrossBatchRowOutSchema(index=index, result=result)
+
+    def _get_vectorized(
+        self, row: GrossInSchema, resolver: TaxesCalculatorResolver, rounder: Rounder
+    ) -> VectorizedTaxesCalculator | None:
+        context = resolver.context
+
+        if rounder is not context.tax_rounder:
+            return None
+
+        try:
+            tax = resolver.get_tax(row.tax_id)
+            ss = resolver.get_ss(row.ss_id)
+        except (TaxNotFoundError, SSNotFoundError, DefaultTaxNotSetError, DefaultSSNotSetError):
+            return None
+
+        if ss.rounder is not context.ss_rounder:
+            return None
+
+        return resolver.cache.get_vectorized(tax, ss)
+
+    def _calculate_rows(
+        self,
+        rows: list[tuple[int, GrossInSchema]],
+        resolver: TaxesCalculatorResolver,
+        rounder: Rounder,
+    ) -> dict[int, GrossBatchRowOutSchema]:
+        results = {}
+        calculators: dict[tuple[int | None, int | None], VectorizedTaxesCalculator | None] = {}
+        groups: dict[VectorizedTaxesCalculator, list[tuple[int, GrossInSchema]]] = {}
+
+        for index, row in rows:
+            key = (row.tax_id, row.ss_id)
+
+            if key not in calculators:
+                calculators[key] = self._get_vectorized(row, resolver, rounder)
+
+            calculator = calculators[key]
+
+            if calculator is None:
+                results[index] = self._calculate_row(index, row, resolver, rounder)
+            else:
+                groups.setdefault(calculator, []).append((index, row))
+
+        for calculator, group in groups.items():
+            salaries, salary_exponents, salaries_valid = calculator.to_units(
+                row.salary for _, row in group
+            )
+            compensations, compensation_exponents, compensations_valid = calculator.to_units(
+                row.compensation for _, row in group
+            )
+            ss_salaries, ss_salary_exponents, ss_salaries_valid = calculator.to_units(
+                row.ss_salary for _, row in group
+            )
+            arrays = calculator.calculate_gross(
+                salaries,
+                compensations,
+                ss_salaries,
+                salary_exponents,
+                compensation_exponents,
+                ss_salary_exponents,
+            )
+
+            brackets_tax = from_units(arrays.brackets_tax, arrays.brackets_tax_exponents)
+            fixed_tax = from_units(arrays.fixed_tax, arrays.fixed_tax_exponents)
+            social_security = from_units(arrays.social_security, arrays.social_security_exponents)
+
+            rows_valid = (
+                arrays.valid & salaries_valid & compensations_valid & ss_salaries_valid
+            ).tolist()
+
+            for position, (index, row) in enumerate(group):
+                # rows the Decimal path would reject or price differently are left to it
+                if not rows_valid[position]:
+                    results[index] = self._calculate_row(index, row, resolver, rounder)
+                    continue
+
+                result = self._get_salary_schema(
+                    row.salary,
+                    row.compensation,
+                    brackets_tax[position],
+                    fixed_tax[position],
+                    Decimal(0) if row.ss_salary is None else social_security[position],
+                )
+                results[index] = GrossBatchRowOutSchema(index=index, result=result)
+
+        return results
+
+    def calculate_gross_batch(
+        self,
+        rows: Iterable[GrossInSchema],
+        resolver: TaxesCalculatorResolver,
+        rounder: Rounder,
+    ) -> list[GrossBatchRowOutSchema]:
+        started_at = time.perf_counter()
+        rows = list(rows)
+        resolver.prefetch((row.tax_id for row in rows), (row.ss_id for row in rows))
+
+        calculated = self._calculate_rows(list(enumerate(rows)), resolver, rounder)
+        results = [calculated[index] for index in range(len(rows))]
+        record_rows("batch", len(results), started_at)
+        return results
+
+    @profiler.track_thread
+    def calculate_lines(
+        self,
+        lines: list[str],
+        start: int,
+        codec: GrossStreamCodec,
+        resolver: TaxesCalculatorResolver,
+        rounder: Rounder,
+        *,
+        final: bool = False,
+    ) -> tuple[bytes, int]:
+        started_at = time.perf_counter()
+        rows = codec.parse(lines, final=final)
+        valid_rows = [row for row in rows if isinstance(row, GrossInSchema)]
+        resolver.prefetch((row.tax_id for row in valid_rows), (row.ss_id for row in valid_rows))
+
+        calculated = self._calculate_rows(
+            [
+                (index, row)
+                for index, row in enumerate(rows, start=start)
+                if isinstance(row, GrossInSchema)
+            ],
+            resolver,
+            rounder,
+        )
+        results = [
+            GrossBatchRowOutSchema(index=index, error=row)
+            if isinstance(row, str)
+            else calculated[index]
+            for index, row in enumerate(rows, start=start)
+        ]
+        record_rows("stream", len(results), started_at)
+
+        return codec.dump(results), start + len(rows)
+
+    async def calculate_gross_stream(
+        self,
+        chunks: AsyncIterable[bytes],
+        codec: GrossStreamCodec,
+        resolver: TaxesCalculatorResolver,
+        rounder: Rounder,
+    ) -> AsyncIterator[bytes]:
+        index = 0
+
+        async for lines in iter_lines(chunks):
+            output, index = await run_in_threadpool(
+                self.calculate_lines, lines, index, codec, resolver, rounder
+            )
+
+            if output:
+                yield output
+
+        # a record left open by an unterminated quote still gets its row
+        output, index = await run_in_threadpool(
+            self.calculate_lines, [], index, codec, resolver, rounder, final=True
+        )
+
+        if output:
+            yield output
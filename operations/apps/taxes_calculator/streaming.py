@@ -0,0 +1,211 @@
+import codecs
+import csv
+import io
+import json
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from typing import Any, Protocol
+
+from pydantic import ValidationError
+
+from .schemas import GrossBatchRowOutSchema, GrossInSchema
+
+type ParsedRow = GrossInSchema | str
+
+CSV_OUT_FIELDS = (
+    "index",
+    "gross_salary",
+    "gross_compensation",
+    "gross_total",
+    "gross_compensation_to_total",
+    "deduction_taxes_brackets",
+    "deduction_taxes_fixed",
+    "deduction_taxes_total",
+    "deduction_social_security",
+    "deduction_total",
+    "net",
+    "error",
+)
+
+
+class UnsupportedMediaTypeError(Exception):
+    pass
+
+
+def _get_validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+
+def _parse_row(values: dict[str, Any]) -> ParsedRow:
+    try:
+        return GrossInSchema.model_validate(values)
+    except ValidationError as e:
+        return _get_validation_message(e)
+
+
+def _flatten(data: dict[str, Any], prefix: str = "") -> dict[str, Any]:
+    flat = {}
+
+    for key, value in data.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}_"))
+        else:
+            flat[f"{prefix}{key}"] = value
+
+    return flat
+
+
+class GrossStreamCodec(Protocol):
+    media_type: str
+
+    def parse(self, lines: list[str], *, final: bool = False) -> list[ParsedRow]: ...
+
+    def dump(self, rows: Iterable[GrossBatchRowOutSchema]) -> bytes: ...
+
+
+class LineBuffer:
+    def __init__(self) -> None:
+        self._lines: deque[str] = deque()
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        # unlike a generator, the buffer can be read again after it runs out
+        if not self._lines:
+            raise StopIteration
+        return self._lines.popleft()
+
+    def extend(self, lines: Iterable[str]) -> None:
+        self._lines.extend(lines)
+
+
+class CSVCodec:
+    media_type = "text/csv"
+
+    def __init__(self, header: list[str] | None = None, *, write_header: bool = True) -> None:
+        self._header = header
+        self._header_written = not write_header
+
+        self._lines = LineBuffer()
+        self._reader = csv.reader(self._lines)
+        self._record: list[str] = []
+        self._quotes = 0
+
+    def _feed(self, lines: list[str], *, final: bool) -> None:
+        complete = []
+
+        # the reader starts over on every row, so it's only given whole records, and quoted fields
+        # spanning lines or chunks stay together
+        for line in lines:
+            self._record.append(line + "\n")
+            self._quotes += line.count('"')
+
+            if self._quotes % 2 == 0:
+                complete.extend(self._record)
+                self._record.clear()
+                self._quotes = 0
+
+        if final:
+            complete.extend(self._record)
+            self._record.clear()
+            self._quotes = 0
+
+        self._lines.extend(complete)
+
+    def parse(self, lines: list[str], *, final: bool = False) -> list[ParsedRow]:
+        self._feed(lines, final=final)
+
+        if self._header is None:
+            header = next(self._reader, None)
+
+            if header is None:
+                return []
+
+            self._header = [name.strip() for name in header]
+
+        return [
+            _parse_row({key: value for key, value in zip(self._header, row, strict=False) if value})
+            for row in self._reader
+            if row
+        ]
+
+    def dump(self, rows: Iterable[GrossBatchRowOutSchema]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_OUT_FIELDS)
+
+        if not self._header_written:
+            writer.writeheader()
+            self._header_written = True
+
+        for row in rows:
+            if row.result is None:
+                writer.writerow({"index": row.index, "error": row.error})
+            else:
+                writer.writerow({"index": row.index, **_flatten(row.result.model_dump())})
+
+        return buffer.getvalue().encode("utf-8")
+
+
+class NDJSONCodec:
+    media_type = "application/x-ndjson"
+
+    def parse(self, lines: list[str], *, final: bool = False) -> list[ParsedRow]:  # noqa: ARG002
+        rows = []
+
+        for line in lines:
+            if not line.strip():
+                continue
+
+            try:
+                values = json.loads(line)
+            except json.JSONDecodeError as e:
+                rows.append(f"Invalid JSON: {e.msg}")
+                continue
+
+            if not isinstance(values, dict):
+                rows.append("Invalid JSON: expected an object")
+                continue
+
+            rows.append(_parse_row(values))
+
+        return rows
+
+    def dump(self, rows: Iterable[GrossBatchRowOutSchema]) -> bytes:
+        return b"".join(row.model_dump_json().encode("utf-8") + b"\n" for row in rows)
+
+
+CODECS: dict[str, type[CSVCodec] | type[NDJSONCodec]] = {
+    "text/csv": CSVCodec,
+    "application/x-ndjson": NDJSONCodec,
+    "application/jsonl": NDJSONCodec,
+}
+
+
+def get_codec(content_type: str) -> GrossStreamCodec:
+    media_type = content_type.split(";")[0].strip().lower()
+
+    if media_type not in CODECS:
+        message = f"Unsupported media type '{media_type}', expected one of {', '.join(CODECS)}"
+        raise UnsupportedMediaTypeError(message)
+
+    return CODECS[media_type]()
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[list[str]]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    remainder = ""
+
+    async for chunk in chunks:
+        lines = (remainder + decoder.decode(chunk)).split("\n")
+        remainder = lines.pop()
+
+        if lines:
+            yield lines
+
+    remainder += decoder.decode(b"", final=True)
+
+    if remainder:
+        yield [remainder]
@@ -0,0 +1,348 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+from decimal import Decimal, getcontext
+from typing import NamedTuple
+
+import numpy as np
+from syriantaxes import RoundingMethod
+
+from operations.apps.tax.compiled import CompiledTax
+
+NO_SS_SALARY = -1
+
+# products are kept well below the int64 limit so sums and rounding steps can't overflow
+MAX_PRODUCT = np.iinfo(np.int64).max // 4
+MAX_PRODUCT_DIGITS = len(str(MAX_PRODUCT))
+
+
+def _get_scale(values: Iterable[Decimal]) -> int:
+    exponents = [value.normalize().as_tuple().exponent for value in values]
+    return 10 ** max([0, *(-exponent for exponent in exponents if isinstance(exponent, int))])
+
+
+def _to_int(value: Decimal, scale: int) -> int:
+    scaled = value * scale
+
+    if scaled != scaled.to_integral_value():
+        message = f"{value} can't be represented with a scale of {scale}"
+        raise ValueError(message)
+
+    return int(scaled)
+
+
+def get_exponent(value: Decimal) -> int:
+    if not value.is_finite():
+        message = f"{value} is not a finite number"
+        raise ValueError(message)
+
+    return int(value.as_tuple().exponent)
+
+
+def from_units(values: np.ndarray, exponents: np.ndarray, scale: int = 100) -> list[Decimal]:
+    # each value is rebuilt with the exponent the Decimal arithmetic would have given it
+    scale_exponent = len(str(scale)) - 1
+    results = []
+
+    for value, exponent in zip(values.tolist(), exponents.tolist(), strict=True):
+        shift = exponent + scale_exponent
+        coefficient = value // 10**shift if shift >= 0 else value * 10**-shift
+        results.append(Decimal(coefficient).scaleb(exponent))
+
+    return results
+
+
+def _count_trailing_zeros(values: np.ndarray) -> np.ndarray:
+    counts = np.zeros(values.shape, dtype=np.int64)
+    divisible = values != 0
+
+    while divisible.any():
+        divisible &= values % 10 == 0
+        counts += divisible
+        values = np.where(divisible, values // 10, values)
+
+    return counts
+
+
+@dataclass(frozen=True, slots=True)
+class VectorRounder:
+    method: RoundingMethod
+    to_nearest: Decimal
+
+    def round(
+        self, values: np.ndarray, exponents: np.ndarray, scale: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        to_nearest = _to_int(self.to_nearest, scale)
+
+        negative = values < 0
+        quotient, remainder = np.divmod(np.abs(values), to_nearest)
+        inexact = remainder != 0
+
+        match self.method:
+            case RoundingMethod.DOWN:
+                away = np.zeros_like(inexact)
+            case RoundingMethod.UP:
+                away = inexact
+            case RoundingMethod.CEILING:
+                away = inexact & ~negative
+            case RoundingMethod.FLOOR:
+                away = inexact & negative
+            case RoundingMethod.HALF_UP:
+                away = 2 * remainder >= to_nearest
+            case RoundingMethod.HALF_DOWN:
+                away = 2 * remainder > to_nearest
+            case RoundingMethod.HALF_EVEN:
+                away = (2 * remainder > to_nearest) | (
+                    (2 * remainder == to_nearest) & (quotient % 2 == 1)
+                )
+            case RoundingMethod.UP05:
+                away = inexact & ((quotient % 5) == 0)
+
+        rounded = (quotient + away) * to_nearest
+
+        # Rounder.round divides by to_nearest, takes the integral value and multiplies back,
+        # so only an exact quotient can keep a positive exponent through to_integral_value
+        step_exponent = get_exponent(self.to_nearest)
+        ideal = exponents - step_exponent
+        quotient_exponent = np.where(
+            quotient == 0, ideal, np.minimum(ideal, _count_trailing_zeros(quotient))
+        )
+        rounded_exponents = step_exponent + np.where(inexact, 0, np.maximum(quotient_exponent, 0))
+
+        return np.where(negative, -rounded, rounded), rounded_exponents
+
+
+class GrossArrays(NamedTuple):
+    brackets_tax: np.ndarray
+    fixed_tax: np.ndarray
+    social_security: np.ndarray
+    net: np.ndarray
+    valid: np.ndarray
+    brackets_tax_exponents: np.ndarray
+    fixed_tax_exponents: np.ndarray
+    social_security_exponents: np.ndarray
+
+
+class VectorizedTaxesCalculator:
+    def __init__(  # noqa: PLR0913
+        self,
+        tax: CompiledTax,
+        rounder: VectorRounder,
+        ss_rounder: VectorRounder,
+        ss_min_salary: Decimal | None = None,
+        ss_deduction_rate: Decimal | None = None,
+        scale: int = 100,
+    ) -> None:
+        if not tax.ordered or not tax.maxs:
+            message = "Vectorized calculation requires sorted, non-overlapping brackets"
+            raise ValueError(message)
+
+        rates = [*tax.rates, tax.fixed_tax_rate]
+
+        if ss_deduction_rate is not None:
+            rates.append(ss_deduction_rate)
+
+        self._scale = scale
+        self._scale_exponent = len(str(scale)) - 1
+        self._rate_scale = _get_scale(rates)
+        self._rounder = rounder
+        self._ss_rounder = ss_rounder
+
+        self._mins = np.array([_to_int(value, scale) for value in tax.mins], dtype=np.int64)
+        self._maxs = np.array([_to_int(value, scale) for value in tax.maxs], dtype=np.int64)
+        self._rates = np.array(
+            [_to_int(value, self._rate_scale) for value in tax.rates], dtype=np.int64
+        )
+        self._cumulative = np.concatenate(
+            ([0], np.cumsum((self._maxs - self._mins) * self._rates)[:-1])
+        ).astype(np.int64)
+        self._fixed_tax_rate = _to_int(tax.fixed_tax_rate, self._rate_scale)
+
+        self._ss_min_salary = None if ss_min_salary is None else _to_int(ss_min_salary, scale)
+        self._ss_deduction_rate = (
+            None if ss_deduction_rate is None else _to_int(ss_deduction_rate, self._rate_scale)
+        )
+
+        self._mins_exponents = np.array([get_exponent(value) for value in tax.mins])
+        self._rates_exponents = np.array([get_exponent(value) for value in tax.rates])
+        self._cumulative_exponents = np.array([get_exponent(value) for value in tax.cumulative])
+        self._fixed_tax_rate_exponent = get_exponent(tax.fixed_tax_rate)
+        self._ss_deduction_rate_exponent = (
+            0 if ss_deduction_rate is None else get_exponent(ss_deduction_rate)
+        )
+
+        if _to_int(tax.total, scale * self._rate_scale) > MAX_PRODUCT:
+            message = "The brackets are too large for a vectorized calculation"
+            raise ValueError(message)
+
+        max_rate = max(int(self._rates.max()), self._fixed_tax_rate, self._ss_deduction_rate or 0)
+        self.max_amount = MAX_PRODUCT // max(max_rate, 1)
+
+        # the Decimal path keeps every digit down to these exponents, and the default context
+        # only holds 28 of them, so finer amounts are left to it
+        product_exponent = (
+            MAX_PRODUCT_DIGITS - len(str(scale * self._rate_scale)) + 1 - getcontext().prec
+        )
+        rate_exponents = [
+            *self._rates_exponents.tolist(),
+            self._fixed_tax_rate_exponent,
+            self._ss_deduction_rate_exponent,
+        ]
+        self.min_exponent = product_exponent - min(rate_exponents)
+
+        if min(*self._mins_exponents.tolist(), *self._cumulative_exponents.tolist()) < (
+            product_exponent
+        ):
+            message = "The brackets are too precise for a vectorized calculation"
+            raise ValueError(message)
+
+        for vector_rounder in (rounder, ss_rounder):
+            _to_int(vector_rounder.to_nearest, scale)
+
+            if get_exponent(vector_rounder.to_nearest) < self.min_exponent:
+                message = f"{vector_rounder.to_nearest} is too precise for a vectorized calculation"
+                raise ValueError(message)
+
+    def to_units(
+        self, values: Iterable[Decimal | None]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        units = []
+        exponents = []
+        valid = []
+
+        for value in values:
+            if value is None:
+                units.append(NO_SS_SALARY)
+                exponents.append(0)
+                valid.append(True)
+                continue
+
+            # negative amounts can round to a signed zero that integers can't hold, and finer
+            # amounts would need more digits than the Decimal context keeps
+            exponent = value.as_tuple().exponent if value.is_finite() else None
+            scaled = value.scaleb(self._scale_exponent)
+
+            if (
+                exponent is None
+                or value.is_signed()
+                or exponent < self.min_exponent
+                or scaled.adjusted() >= MAX_PRODUCT_DIGITS
+            ):
+                units.append(0)
+                exponents.append(0)
+                valid.append(False)
+                continue
+
+            value_units = int(scaled)
+            is_valid = value_units == scaled and value_units <= self.max_amount
+
+            units.append(value_units if is_valid else 0)
+            exponents.append(exponent)
+            valid.append(is_valid)
+
+        return (
+            np.array(units, dtype=np.int64),
+            np.array(exponents, dtype=np.int64),
+            np.array(valid, dtype=bool),
+        )
+
+    def _round(
+        self, rounder: VectorRounder, values: np.ndarray, exponents: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        values, exponents = rounder.round(values, exponents, self._scale * self._rate_scale)
+        return values // self._rate_scale, exponents
+
+    def _calculate_ss_deduction(
+        self, salaries: np.ndarray, exponents: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._ss_deduction_rate is None or self._ss_min_salary is None:
+            message = "Social security is not configured for this calculator"
+            raise ValueError(message)
+
+        deduction, deduction_exponents = self._round(
+            self._ss_rounder,
+            salaries * self._ss_deduction_rate,
+            exponents + self._ss_deduction_rate_exponent,
+        )
+        return deduction, deduction_exponents, salaries >= self._ss_min_salary
+
+    def calculate_brackets_tax(
+        self, amounts: np.ndarray, exponents: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        index = np.searchsorted(self._maxs, amounts, side="left")
+        in_range = index < len(self._maxs)
+        index = np.minimum(index, len(self._maxs) - 1)
+        mins = self._mins[index]
+
+        tax = self._cumulative[index] + self._rates[index] * (amounts - mins)
+        tax_exponents = np.minimum(
+            self._cumulative_exponents[index],
+            self._rates_exponents[index] + np.minimum(exponents, self._mins_exponents[index]),
+        )
+        tax, tax_exponents = self._round(self._rounder, tax, tax_exponents)
+
+        return tax, tax_exponents, in_range & (mins <= amounts)
+
+    def calculate_gross(  # noqa: PLR0913
+        self,
+        salaries: np.ndarray,
+        compensations: np.ndarray,
+        ss_salaries: np.ndarray,
+        salary_exponents: np.ndarray,
+        compensation_exponents: np.ndarray,
+        ss_salary_exponents: np.ndarray,
+    ) -> GrossArrays:
+        salaries = np.asarray(salaries, dtype=np.int64)
+        compensations = np.asarray(compensations, dtype=np.int64)
+        ss_salaries = np.asarray(ss_salaries, dtype=np.int64)
+
+        valid = (np.abs(salaries) <= self.max_amount) & (np.abs(compensations) <= self.max_amount)
+        valid &= np.abs(ss_salaries) <= self.max_amount
+
+        social_security = np.zeros(salaries.shape, dtype=np.int64)
+        social_security_exponents = np.zeros(salaries.shape, dtype=np.int64)
+        taxable_salaries = salaries
+        taxable_exponents = salary_exponents
+        has_ss = ss_salaries != NO_SS_SALARY
+
+        if has_ss.any():
+            deduction, deduction_exponents, ss_valid = self._calculate_ss_deduction(
+                np.where(has_ss, ss_salaries, 0), ss_salary_exponents
+            )
+            social_security = np.where(has_ss, deduction, 0)
+            social_security_exponents = deduction_exponents
+            valid &= ~has_ss | ss_valid
+
+            # the Decimal path deducts from the salary itself when the ss salary is zero
+            uses_salary = ss_salaries == 0
+            tax_deduction, tax_deduction_exponents, tax_ss_valid = self._calculate_ss_deduction(
+                np.where(uses_salary, salaries, ss_salaries),
+                np.where(uses_salary, salary_exponents, ss_salary_exponents),
+            )
+            taxable_salaries = np.where(has_ss, salaries - tax_deduction, salaries)
+            taxable_exponents = np.where(
+                has_ss, np.minimum(salary_exponents, tax_deduction_exponents), salary_exponents
+            )
+            valid &= ~has_ss | tax_ss_valid
+
+        brackets_tax, brackets_tax_exponents, in_brackets = self.calculate_brackets_tax(
+            taxable_salaries, taxable_exponents
+        )
+        valid &= in_brackets
+
+        fixed_tax, fixed_tax_exponents = self._round(
+            self._rounder,
+            compensations * self._fixed_tax_rate,
+            compensation_exponents + self._fixed_tax_rate_exponent,
+        )
+        net = salaries + compensations - brackets_tax - fixed_tax - social_security
+
+        return GrossArrays(
+            brackets_tax=brackets_tax,
+            fixed_tax=fixed_tax,
+            social_security=social_security,
+            net=net,
+            valid=valid,
+            brackets_tax_exponents=brackets_tax_exponents,
+            fixed_tax_exponents=fixed_tax_exponents,
+            social_security_exponents=social_security_exponents,
+        )
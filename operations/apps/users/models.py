@@ -2,16 +2,18 @@ import uuid
 from datetime import datetime
 from typing import Literal
 
-from sqlalchemy import UUID, Boolean, DateTime, String, func
+from sqlalchemy import UUID, Boolean, DateTime, Index, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from operations.core.db import Base
+from operations.core.search import search_indexes
 
 type Role = Literal["admin", "user", "staff"]
 
 
 class UserDB(Base):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_created_at_uid", "created_at", "uid"),)
 
     uid: Mapped[uuid.UUID] = mapped_column(UUID, primary_key=True, default=uuid.uuid4)
     username: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
@@ -38,3 +40,11 @@ class UserDB(Base):
             f" role={self.role},"
             ")>"
         )
+
+
+user_search = search_indexes.add(
+    UserDB.__table__.c.username,
+    UserDB.__table__.c.email,
+    UserDB.__table__.c.firstname,
+    UserDB.__table__.c.lastname,
+)
@@ -1,13 +1,28 @@
 from collections.abc import Iterable
+from typing import Any
 
-from bcrypt import checkpw, gensalt, hashpw
+from sqlalchemy import Select, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Query, Session
 from sqlalchemy.sql import not_, text
 
-from .models import Role, UserDB
+from operations.core.executors import hashing_executor
+from operations.core.hashers import password_hashers
+from operations.core.pagination import Keyset
+from operations.core.versions import ALL, get_row_name, versions
+
+from .models import Role, UserDB, user_search
 from .schemas import UserCreateSchema, UserUpdateSchema
 
 
+def _bump_versions(session: Session | AsyncSession, *usernames: object) -> None:
+    versions.bump(
+        session,
+        UserDB.__tablename__,
+        *(get_row_name(UserDB.__tablename__, username) for username in usernames),
+    )
+
+
 class UserNotFoundError(Exception):
     pass
 
@@ -24,15 +39,23 @@ class PasswordIncorrectError(Exception):
     pass
 
 
+def hash_password(password: str) -> str:
+    return password_hashers.hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return password_hashers.verify(password, hashed_password)
+
+
 class UserService:
     def __init__(self, session: Session) -> None:
         self._db = session
 
     def _hash_password(self, password: str) -> str:
-        return hashpw(password.encode("utf-8"), gensalt()).decode("utf-8")
+        return hashing_executor.call(hash_password, password)
 
     def _verify_password(self, password: str, hashed_password: str) -> bool:
-        return checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+        return hashing_executor.call(verify_password, password, hashed_password)
 
     def _set_new_password(self, user: UserDB, new_password: str) -> UserDB:
         user.hash_password = self._hash_password(new_password)
@@ -52,7 +75,7 @@ class UserService:
     def get_all(self, query: str, offset: int, limit: int, order_by: Iterable[str]) -> list[UserDB]:
         return (
             self._db.query(UserDB)
-            .where(UserDB.username.ilike(f"%{query}%"))
+            .where(user_search.search(query))
             .order_by(*[text(field) for field in order_by])
             .offset(offset)
             .limit(limit)
@@ -106,11 +129,34 @@ class UserService:
 
         return user
 
+    def get_existing(
+        self, usernames: Iterable[str], emails: Iterable[str]
+    ) -> tuple[set[str], set[str]]:
+        existing_usernames = self._db.scalars(
+            select(UserDB.username).where(UserDB.username.in_(set(usernames)))
+        )
+        existing_emails = self._db.scalars(
+            select(UserDB.email).where(UserDB.email.in_(set(emails)))
+        )
+        return set(existing_usernames), set(existing_emails)
+
+    def create_bulk(self, users: list[dict[str, Any]]) -> int:
+        if not users:
+            return 0
+
+        self._db.execute(insert(UserDB), users)
+        _bump_versions(self._db)
+        self._db.commit()
+
+        return len(users)
+
     def update(self, username: str, schema: UserUpdateSchema) -> UserDB:
         user = self.get_by_username(username)
 
         if schema.username is not None:
-            existing_user = self._db.query(UserDB).filter(UserDB.username == schema.username).first()
+            existing_user = (
+                self._db.query(UserDB).filter(UserDB.username == schema.username).first()
+            )
 
             if existing_user is not None and existing_user.uid != user.uid:
                 message = f"User with username '{schema.username}' already exists"
@@ -127,6 +173,7 @@ class UserService:
             if value is not None:
                 setattr(user, key, value)
 
+        _bump_versions(self._db, username, user.username)
         self._db.commit()
         self._db.refresh(user)
 
@@ -153,6 +200,7 @@ class UserService:
 
         user.role = role
 
+        _bump_versions(self._db, user.username)
         self._db.commit()
         self._db.refresh(user)
 
@@ -166,6 +214,7 @@ class UserService:
 
         user.is_active = True
 
+        _bump_versions(self._db, user.username)
         self._db.commit()
         self._db.refresh(user)
 
@@ -182,6 +231,7 @@ class UserService:
             return query.all()
 
         query.update({UserDB.is_active: True})
+        _bump_versions(self._db, *usernames)
         self._db.commit()
         self._db.refresh(query)
 
@@ -195,6 +245,7 @@ class UserService:
 
         user.is_active = False
 
+        _bump_versions(self._db, user.username)
         self._db.commit()
         self._db.refresh(user)
 
@@ -204,13 +255,16 @@ class UserService:
         query = self._get_existence_usernames_query(usernames)
 
         deactivated_users = (
-            self._db.query(UserDB).filter(not_(UserDB.is_active), UserDB.username.in_(usernames)).count()
+            self._db.query(UserDB)
+            .filter(not_(UserDB.is_active), UserDB.username.in_(usernames))
+            .count()
         )
 
         if deactivated_users == len(usernames):
             return query.all()
 
         query.update({UserDB.is_active: False})
+        _bump_versions(self._db, *usernames)
         self._db.commit()
         self._db.refresh(query)
 
@@ -219,13 +273,241 @@ class UserService:
     def delete(self, username: str) -> None:
         user = self.get_by_username(username)
         self._db.delete(user)
+        _bump_versions(self._db, username)
         self._db.commit()
 
     def delete_bulk(self, usernames: list[str]) -> None:
         query = self._get_existence_usernames_query(usernames)
         query.delete()
+        _bump_versions(self._db, *usernames)
         self._db.commit()
 
     def empty(self) -> None:
         self._db.query(UserDB).delete()
+        _bump_versions(self._db, ALL)
         self._db.commit()
+
+
+class AsyncUserService:
+    def __init__(self, session: AsyncSession, read_session: AsyncSession | None = None) -> None:
+        self._db = session
+        self._read_db = session if read_session is None else read_session
+
+    async def _hash_password(self, password: str) -> str:
+        return await hashing_executor.run(hash_password, password)
+
+    async def _verify_password(self, password: str, hashed_password: str) -> bool:
+        return await hashing_executor.run(verify_password, password, hashed_password)
+
+    async def _set_new_password(self, user: UserDB, new_password: str) -> UserDB:
+        user.hash_password = await self._hash_password(new_password)
+        await self._db.commit()
+        await self._db.refresh(user)
+        return user
+
+    async def _get_existence_usernames_statement(self, usernames: list[str]) -> Select:
+        statement = select(UserDB).where(UserDB.username.in_(usernames))
+        count = await self._db.scalar(select(func.count()).select_from(statement.subquery()))
+
+        if len(usernames) != count:
+            message = f"Some User with username '{usernames}' not found"
+            raise UserNotFoundError(message)
+
+        return statement
+
+    async def _set_active_bulk(self, usernames: list[str], *, is_active: bool) -> list[UserDB]:
+        statement = await self._get_existence_usernames_statement(usernames)
+
+        await self._db.execute(
+            update(UserDB)
+            .where(UserDB.username.in_(usernames), UserDB.is_active != is_active)
+            .values(is_active=is_active)
+            .execution_options(synchronize_session="fetch")
+        )
+        _bump_versions(self._db, *usernames)
+        await self._db.commit()
+
+        result = await self._db.scalars(statement.execution_options(populate_existing=True))
+        return list(result.all())
+
+    async def get_all(  # noqa: PLR0913
+        self,
+        query: str,
+        offset: int,
+        limit: int,
+        order_by: Iterable[str],
+        cursor: str | None = None,
+    ) -> list[UserDB]:
+        keyset = Keyset(UserDB.__table__, order_by)
+        result = await self._read_db.scalars(
+            select(UserDB)
+            .where(user_search.search(query), keyset.after(cursor))
+            .order_by(*keyset.order_by())
+            .offset(offset)
+            .limit(limit)
+        )
+        return list(result.all())
+
+    def get_next_cursor(
+        self, items: list[UserDB], limit: int, order_by: Iterable[str]
+    ) -> str | None:
+        return Keyset(UserDB.__table__, order_by).get_next_cursor(items, limit)
+
+    async def get_by_uid(self, uid: str) -> UserDB:
+        user = await self._db.scalar(select(UserDB).where(UserDB.uid == uid))
+
+        if user is None:
+            message = f"User with uid '{uid}' not found"
+            raise UserNotFoundError(message)
+
+        return user
+
+    async def get_by_username(self, username: str) -> UserDB:
+        user = await self._db.scalar(select(UserDB).where(UserDB.username == username))
+
+        if user is None:
+            message = f"User with username '{username}' not found"
+            raise UserNotFoundError(message)
+
+        return user
+
+    async def get_by_email(self, email: str) -> UserDB:
+        user = await self._db.scalar(select(UserDB).where(UserDB.email == email))
+
+        if user is None:
+            message = f"User with email '{email}' not found"
+            raise UserNotFoundError(message)
+
+        return user
+
+    async def create(self, schema: UserCreateSchema, password: str) -> UserDB:
+        existing_user = await self._db.scalar(
+            select(UserDB).where(UserDB.username == schema.username)
+        )
+
+        if existing_user is not None:
+            message = f"User with username '{schema.username}' already exists"
+            raise UsernameAlreadyExistsError(message)
+
+        existing_user = await self._db.scalar(select(UserDB).where(UserDB.email == schema.email))
+
+        if existing_user is not None:
+            message = f"User with email '{schema.email}' already exists"
+            raise EmailAlreadyExistsError(message)
+
+        user = UserDB(**schema.model_dump(), hash_password=await self._hash_password(password))
+
+        self._db.add(user)
+        await self._db.commit()
+        await self._db.refresh(user)
+
+        return user
+
+    async def update(self, username: str, schema: UserUpdateSchema) -> UserDB:
+        user = await self.get_by_username(username)
+
+        if schema.username is not None:
+            existing_user = await self._db.scalar(
+                select(UserDB).where(UserDB.username == schema.username)
+            )
+
+            if existing_user is not None and existing_user.uid != user.uid:
+                message = f"User with username '{schema.username}' already exists"
+                raise UsernameAlreadyExistsError(message)
+
+        if schema.email is not None:
+            existing_user = await self._db.scalar(
+                select(UserDB).where(UserDB.email == schema.email)
+            )
+
+            if existing_user is not None and existing_user.uid != user.uid:
+                message = f"User with email '{schema.email}' already exists"
+                raise EmailAlreadyExistsError(message)
+
+        for key, value in schema.model_dump().items():
+            if value is not None:
+                setattr(user, key, value)
+
+        _bump_versions(self._db, username, user.username)
+        await self._db.commit()
+        await self._db.refresh(user)
+
+        return user
+
+    async def reset_password(self, username: str, new_password: str) -> UserDB:
+        user = await self.get_by_username(username)
+        return await self._set_new_password(user, new_password)
+
+    async def change_password(self, username: str, old_password: str, new_password: str) -> UserDB:
+        user = await self.get_by_username(username)
+
+        if not await self._verify_password(old_password, user.hash_password):
+            message = "Invalid password"
+            raise PasswordIncorrectError(message)
+
+        return await self._set_new_password(user, new_password)
+
+    async def change_role(self, username: str, role: Role) -> UserDB:
+        user = await self.get_by_username(username)
+
+        if user.role == role:
+            return user
+
+        user.role = role
+
+        _bump_versions(self._db, user.username)
+        await self._db.commit()
+        await self._db.refresh(user)
+
+        return user
+
+    async def activate(self, username: str) -> UserDB:
+        user = await self.get_by_username(username)
+
+        if user.is_active:
+            return user
+
+        user.is_active = True
+
+        _bump_versions(self._db, user.username)
+        await self._db.commit()
+        await self._db.refresh(user)
+
+        return user
+
+    async def activate_bulk(self, usernames: list[str]) -> list[UserDB]:
+        return await self._set_active_bulk(usernames, is_active=True)
+
+    async def deactivate(self, username: str) -> UserDB:
+        user = await self.get_by_username(username)
+
+        if not user.is_active:
+            return user
+
+        user.is_active = False
+
+        _bump_versions(self._db, user.username)
+        await self._db.commit()
+        await self._db.refresh(user)
+
+        return user
+
+    async def deactivate_bulk(self, usernames: list[str]) -> list[UserDB]:
+        return await self._set_active_bulk(usernames, is_active=False)
+
+    async def delete(self, username: str) -> None:
+        user = await self.get_by_username(username)
+        await self._db.delete(user)
+        _bump_versions(self._db, username)
+        await self._db.commit()
+
+    async def delete_bulk(self, usernames: list[str]) -> None:
+        await self._get_existence_usernames_statement(usernames)
+        await self._db.execute(delete(UserDB).where(UserDB.username.in_(usernames)))
+        _bump_versions(self._db, *usernames)
+        await self._db.commit()
+
+    async def empty(self) -> None:
+        await self._db.execute(delete(UserDB))
+        _bump_versions(self._db, ALL)
+        await self._db.commit()
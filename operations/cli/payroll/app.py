@@ -0,0 +1,148 @@
+import csv
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Annotated
+
+import typer
+from rich.console import Console
+from syriantaxes import Rounder
+from typer_di import Depends, TyperDI
+
+from operations.apps.taxes_calculator.context import CalculatorContextCache
+from operations.apps.taxes_calculator.services import (
+    TaxesCalculatorResolver,
+    TaxesCalculatorService,
+)
+from operations.apps.taxes_calculator.streaming import CSVCodec
+
+from .dependencies import get_console, get_resolver
+from .options import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_WORKERS,
+    ChunkSizeOpt,
+    InputOpt,
+    OutputOpt,
+    WorkersOpt,
+)
+
+app = TyperDI()
+
+
+@dataclass(frozen=True, slots=True)
+class WorkerState:
+    resolver: TaxesCalculatorResolver
+    rounder: Rounder
+    header: list[str]
+
+
+_worker_state: WorkerState
+
+
+def _init_worker(cache: CalculatorContextCache, header: list[str]) -> None:
+    global _worker_state  # noqa: PLW0603
+    _worker_state = WorkerState(
+        resolver=TaxesCalculatorResolver(None, None, cache),
+        rounder=cache.context.tax_rounder,
+        header=header,
+    )
+
+
+def _calculate_chunk(start: int, records: list[str]) -> tuple[bytes, int]:
+    codec = CSVCodec(header=_worker_state.header, write_header=False)
+    # every chunk holds whole records, so whatever the codec still has open is flushed
+    return TaxesCalculatorService().calculate_lines(
+        records, start, codec, _worker_state.resolver, _worker_state.rounder, final=True
+    )
+
+
+def _read_ids(path: Path) -> tuple[set[int], set[int]]:
+    tax_ids = set()
+    ss_ids = set()
+
+    with path.open(newline="", encoding="utf-8-sig") as file:
+        for row in csv.DictReader(file):
+            for key, ids in (("tax_id", tax_ids), ("ss_id", ss_ids)):
+                value = (row.get(key) or "").strip()
+                if value.isdigit():
+                    ids.add(int(value))
+
+    return tax_ids, ss_ids
+
+
+def _iter_records(lines: Iterator[str]) -> Iterator[str]:
+    record: list[str] = []
+    quotes = 0
+
+    # quoted fields may span lines, and a chunk must not split them between workers
+    for line in lines:
+        record.append(line)
+        quotes += line.count('"')
+
+        if quotes % 2 == 0:
+            yield "\n".join(record)
+            record.clear()
+            quotes = 0
+
+    if record:
+        yield "\n".join(record)
+
+
+def _iter_chunks(records: Iterator[str], chunk_size: int) -> Iterator[tuple[int, list[str]]]:
+    start = 0
+
+    while chunk := list(islice(records, chunk_size)):
+        yield start, chunk
+        start += sum(1 for record in chunk if record)
+
+
+@app.command(name="run")
+def run(  # noqa: PLR0913
+    input_path: InputOpt,
+    output_path: OutputOpt,
+    resolver: Annotated[TaxesCalculatorResolver, Depends(get_resolver)],
+    console: Annotated[Console, Depends(get_console)],
+    workers: WorkersOpt = DEFAULT_WORKERS,
+    chunk_size: ChunkSizeOpt = DEFAULT_CHUNK_SIZE,
+):
+    started_at = time.perf_counter()
+    resolver.prefetch(*_read_ids(input_path))
+
+    with input_path.open(newline="", encoding="utf-8-sig") as input_file:
+        header = [name.strip() for name in next(csv.reader(input_file), [])]
+
+        if "salary" not in header:
+            message = "The input file must have a 'salary' column"
+            raise typer.BadParameter(message)
+
+        lines = (line.rstrip("\r\n") for line in input_file)
+        pending: deque[Future[tuple[bytes, int]]] = deque()
+        rows = 0
+
+        with (
+            output_path.open("wb") as output_file,
+            ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(resolver.cache, header),
+            ) as executor,
+        ):
+            output_file.write(CSVCodec().dump([]))
+
+            for start, chunk in _iter_chunks(_iter_records(lines), chunk_size):
+                pending.append(executor.submit(_calculate_chunk, start, chunk))
+
+                while len(pending) >= workers * 2:
+                    output, rows = pending.popleft().result()
+                    output_file.write(output)
+
+            while pending:
+                output, rows = pending.popleft().result()
+                output_file.write(output)
+
+    elapsed = time.perf_counter() - started_at
+    console.print(f"[green]Calculated {rows} rows into '{output_path}' in {elapsed:.2f}s[/green]")
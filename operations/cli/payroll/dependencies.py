@@ -0,0 +1,25 @@
+from collections.abc import Generator
+from typing import Annotated, Any
+
+from rich.console import Console
+from sqlalchemy.orm import Session
+from typer_di import Depends
+
+from operations.apps.ss.services import SocialSecurityService
+from operations.apps.tax.services import TaxService
+from operations.apps.taxes_calculator.context import calculator_contexts
+from operations.apps.taxes_calculator.services import TaxesCalculatorResolver
+from operations.core.db import get_db, init_db
+
+
+def get_console() -> Console:
+    return Console()
+
+
+def get_resolver(
+    _: Annotated[None, Depends(init_db)],
+    session: Annotated[Generator[Session, Any, None], Depends(get_db)],
+) -> TaxesCalculatorResolver:
+    db = next(session)
+    cache = calculator_contexts.get_cache(calculator_contexts.get(db))
+    return TaxesCalculatorResolver(TaxService(db), SocialSecurityService(db), cache)
@@ -0,0 +1,43 @@
+import os
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+InputOpt = Annotated[
+    Path,
+    typer.Option(
+        "--input",
+        exists=True,
+        dir_okay=False,
+        readable=True,
+    ),
+]
+
+OutputOpt = Annotated[
+    Path,
+    typer.Option(
+        "--output",
+        dir_okay=False,
+        writable=True,
+    ),
+]
+
+WorkersOpt = Annotated[
+    int,
+    typer.Option(
+        "--workers",
+        min=1,
+    ),
+]
+
+ChunkSizeOpt = Annotated[
+    int,
+    typer.Option(
+        "--chunk-size",
+        min=1,
+    ),
+]
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_CHUNK_SIZE = 5_000
@@ -1,17 +1,40 @@
-from typing import Annotated
+import csv
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Annotated, Any
 
 import typer
+from pydantic import ValidationError
 from rich.console import Console
+from rich.markup import escape
 from typer_di import Depends, TyperDI
 
-from operations.apps.users.schemas import UserCreateSchema
-from operations.apps.users.services import UsernameAlreadyExistsError, UserService
+from operations.apps.users.schemas import UserCreateSchema, UserPasswordSchema
+from operations.apps.users.services import UsernameAlreadyExistsError, UserService, hash_password
+from operations.core.hashers import UnknownHasherError, calibrate, password_hashers
 
 from .dependencies import get_console, get_create_user_schema, get_user_service
-from .options import PasswordOpt
+from .options import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_TARGET_MS,
+    DEFAULT_WORKERS,
+    BatchSizeOpt,
+    ImportPathArg,
+    PasswordOpt,
+    SchemeOpt,
+    TargetMsOpt,
+    WorkersOpt,
+)
 
 app = TyperDI()
 
+REQUIRED_COLUMNS = {"username", "email", "firstname", "lastname", "password"}
+
+type ImportRow = tuple[int, dict[str, Any], str]
+
 
 @app.command(name="createsuperuser")
 def create_superuser(
@@ -26,3 +49,175 @@ def create_superuser(
         raise typer.BadParameter(str(e)) from None
 
     console.print(f"[green]User '{user.username}' created successfully[/green]")
+
+
+def _get_error_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def _parse_row(row: dict[str, str]) -> tuple[dict[str, Any], str]:
+    messages = []
+
+    try:
+        schema = UserCreateSchema(
+            username=(row.get("username") or "").strip(),
+            email=(row.get("email") or "").strip(),
+            firstname=(row.get("firstname") or "").strip(),
+            lastname=(row.get("lastname") or "").strip(),
+            role=(row.get("role") or "").strip() or "user",
+        )
+    except ValidationError as e:
+        messages.append(_get_error_message(e))
+
+    try:
+        password = UserPasswordSchema(password=row.get("password") or "")
+    except ValidationError as e:
+        messages.append(_get_error_message(e))
+
+    if messages:
+        raise ValueError("; ".join(messages))
+
+    return schema.model_dump(), password.password.get_secret_value()
+
+
+def _iter_batches(
+    path: Path, batch_size: int, errors: list[tuple[int, str]]
+) -> Iterator[list[ImportRow]]:
+    usernames: set[str] = set()
+    emails: set[str] = set()
+    batch: list[ImportRow] = []
+
+    with path.open(newline="", encoding="utf-8-sig") as file:
+        reader = csv.DictReader(file)
+        missing = REQUIRED_COLUMNS - set(reader.fieldnames or ())
+
+        if missing:
+            message = f"The input file is missing the columns: {', '.join(sorted(missing))}"
+            raise typer.BadParameter(message)
+
+        for row in reader:
+            try:
+                user, password = _parse_row(row)
+            except ValueError as e:
+                errors.append((reader.line_num, str(e)))
+                continue
+
+            if user["username"] in usernames:
+                errors.append((reader.line_num, f"Duplicate username '{user['username']}'"))
+                continue
+
+            if user["email"] in emails:
+                errors.append((reader.line_num, f"Duplicate email '{user['email']}'"))
+                continue
+
+            usernames.add(user["username"])
+            emails.add(user["email"])
+            batch.append((reader.line_num, user, password))
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+    if batch:
+        yield batch
+
+
+def _remove_existing(
+    batch: list[ImportRow], service: UserService, errors: list[tuple[int, str]]
+) -> list[ImportRow]:
+    usernames, emails = service.get_existing(
+        (user["username"] for _, user, _ in batch), (user["email"] for _, user, _ in batch)
+    )
+    rows = []
+
+    for line, user, password in batch:
+        if user["username"] in usernames:
+            errors.append((line, f"User with username '{user['username']}' already exists"))
+        elif user["email"] in emails:
+            errors.append((line, f"User with email '{user['email']}' already exists"))
+        else:
+            rows.append((line, user, password))
+
+    return rows
+
+
+@app.command(name="import")
+def import_users(  # noqa: PLR0913
+    path: ImportPathArg,
+    service: Annotated[UserService, Depends(get_user_service)],
+    console: Annotated[Console, Depends(get_console)],
+    workers: WorkersOpt = DEFAULT_WORKERS,
+    batch_size: BatchSizeOpt = DEFAULT_BATCH_SIZE,
+):
+    started_at = time.perf_counter()
+    errors: list[tuple[int, str]] = []
+    pending: deque[tuple[list[dict[str, Any]], Iterator[str]]] = deque()
+    imported = 0
+
+    def insert_next() -> None:
+        nonlocal imported
+
+        users, hashes = pending.popleft()
+
+        for user, hashed_password in zip(users, hashes, strict=True):
+            user["hash_password"] = hashed_password
+
+        imported += service.create_bulk(users)
+        elapsed = time.perf_counter() - started_at
+        console.print(f"{imported} users imported ({imported / elapsed:.0f} users/s)")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in _iter_batches(path, batch_size, errors):
+            rows = _remove_existing(batch, service, errors)
+            passwords = [password for _, _, password in rows]
+            chunksize = max(1, len(passwords) // (workers * 4))
+            hashes = executor.map(hash_password, passwords, chunksize=chunksize)
+
+            # the next batch is hashed while the previous one is inserted
+            pending.append(([user for _, user, _ in rows], hashes))
+
+            while len(pending) > 1:
+                insert_next()
+
+        while pending:
+            insert_next()
+
+    for line, message in sorted(errors):
+        console.print(f"[yellow]Line {line}: {escape(message)}[/yellow]")
+
+    elapsed = time.perf_counter() - started_at
+    console.print(
+        f"[green]Imported {imported} users from '{path}' in {elapsed:.2f}s, "
+        f"skipped {len(errors)} rows[/green]"
+    )
+
+
+@app.command(name="calibrate-hasher")
+def calibrate_hasher(
+    console: Annotated[Console, Depends(get_console)],
+    target_ms: TargetMsOpt = DEFAULT_TARGET_MS,
+    scheme: SchemeOpt = None,
+):
+    try:
+        hasher = password_hashers.get_scheme(scheme or password_hashers.default.scheme)
+    except UnknownHasherError as e:
+        raise typer.BadParameter(str(e)) from None
+
+    chosen, timings = calibrate(hasher, target_ms / 1000)
+
+    for parameters, elapsed in timings:
+        values = ", ".join(f"{name}={value}" for name, value in parameters.items())
+        console.print(f"{hasher.scheme} {values}: {elapsed * 1000:.1f}ms")
+
+    settings = [f"PASSWORD_HASHER={chosen.scheme}"]
+    settings.extend(
+        f"PASSWORD_{chosen.scheme.upper()}_{name.upper()}={value}"
+        for name, value in chosen.get_parameters().items()
+    )
+
+    console.print(f"[green]Add these settings to meet a {target_ms:g}ms hash:[/green]")
+    for setting in settings:
+        console.print(setting)
@@ -1,3 +1,5 @@
+import os
+from pathlib import Path
 from typing import Annotated
 
 import typer
@@ -43,3 +45,49 @@ PasswordOpt = Annotated[
         confirmation_prompt=True,
     ),
 ]
+
+ImportPathArg = Annotated[
+    Path,
+    typer.Argument(
+        exists=True,
+        dir_okay=False,
+        readable=True,
+    ),
+]
+
+WorkersOpt = Annotated[
+    int,
+    typer.Option(
+        "--workers",
+        min=1,
+    ),
+]
+
+BatchSizeOpt = Annotated[
+    int,
+    typer.Option(
+        "--batch-size",
+        min=1,
+    ),
+]
+
+TargetMsOpt = Annotated[
+    float,
+    typer.Option(
+        "--target-ms",
+        min=1,
+        help="The longest a single password hash may take.",
+    ),
+]
+
+SchemeOpt = Annotated[
+    str | None,
+    typer.Option(
+        "--scheme",
+        help="The hash scheme to calibrate, bcrypt or scrypt. Defaults to the configured one.",
+    ),
+]
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_BATCH_SIZE = 1_000
+DEFAULT_TARGET_MS = 250
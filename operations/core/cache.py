@@ -0,0 +1,179 @@
+import inspect
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import wraps
+from threading import Lock
+from typing import Any
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+
+from .config import get_config
+from .etag import conditional
+from .metrics import collect_stats, metrics
+from .serialization import get_serializer, serialized
+from .versions import versions
+
+CACHE_COUNTERS = ("hits", "misses", "evictions")
+
+
+@dataclass(frozen=True, slots=True)
+class CacheEntry:
+    body: bytes
+    tags: tuple[str, ...]
+    expires_at: float
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+
+        self._lock = Lock()
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self.size -= len(entry.body)
+
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.body
+
+    def set(self, key: str, body: bytes, tags: tuple[str, ...], version: tuple[int, ...]) -> None:
+        if len(body) > self.max_bytes:
+            return
+
+        with self._lock:
+            # a tag was bumped while the body was being built, so it may be stale
+            if versions.get(*tags) != version:
+                return
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = CacheEntry(body, tags, time.monotonic() + self.ttl)
+            self.size += len(body)
+
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tag: str) -> None:
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size": self.size,
+        }
+
+    def cached(self, response_model: Any, *tags: str) -> Callable:
+        serialize = get_serializer(response_model)
+
+        def get_response(body: bytes, status: str) -> Response:
+            response = Response(content=body, media_type="application/json")
+            response.headers["X-Cache"] = status
+            return response
+
+        def decorator(func: Callable) -> Callable:
+            if self.max_bytes <= 0:
+                return conditional(serialized(response_model)(func))
+
+            if inspect.iscoroutinefunction(func):
+
+                @wraps(func)
+                async def async_wrapper(request: Request, *args: Any, **kwargs: Any) -> Any:
+                    formatted_tags = format_tags(tags, kwargs)
+                    version = versions.get(*formatted_tags)
+                    key = get_cache_key(request, version)
+                    body = self.get(key)
+
+                    if body is not None:
+                        return get_response(body, "HIT")
+
+                    result = await func(request, *args, **kwargs)
+                    body = serialize(result)
+                    self.set(key, body, formatted_tags, version)
+                    return get_response(body, "MISS")
+
+                return conditional(async_wrapper)
+
+            @wraps(func)
+            def wrapper(request: Request, *args: Any, **kwargs: Any) -> Any:
+                formatted_tags = format_tags(tags, kwargs)
+                version = versions.get(*formatted_tags)
+                key = get_cache_key(request, version)
+                body = self.get(key)
+
+                if body is not None:
+                    return get_response(body, "HIT")
+
+                result = func(request, *args, **kwargs)
+                body = serialize(result)
+                self.set(key, body, formatted_tags, version)
+                return get_response(body, "MISS")
+
+            return conditional(wrapper)
+
+        return decorator
+
+
+def get_cache_key(request: Request, version: tuple[int, ...]) -> str:
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}@{'-'.join(str(number) for number in version)}"
+
+
+def format_tags(tags: tuple[str, ...], kwargs: dict[str, Any]) -> tuple[str, ...]:
+    return tuple(tag.format(**kwargs) for tag in tags)
+
+
+response_cache = ResponseCache(
+    max_bytes=get_config().response_cache_max_bytes,
+    ttl=get_config().response_cache_ttl,
+)
+versions.subscribe(response_cache.invalidate)
+metrics.register(
+    collect_stats("operations_cache", response_cache.stats, CACHE_COUNTERS, cache="response")
+)
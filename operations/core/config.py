@@ -5,9 +5,45 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Config(BaseSettings):
     db_url: str = "sqlite:///operations.sqlite3"
+    db_versions_sync_interval: float = 0.5
+    db_versions_max_rows: int = 10_000
+
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = -1
+    db_pool_timeout: float = 30
+
+    db_replica_urls: list[str] = []  # noqa: RUF012
+    db_replica_sync_interval: float = 0.5
+
+    db_sqlite_journal_mode: str = "WAL"
+    db_sqlite_synchronous: str = "NORMAL"
+    db_sqlite_mmap_size: int = 268_435_456
+    db_sqlite_cache_size: int = -64_000
+    db_sqlite_temp_store: str = "MEMORY"
+    db_sqlite_busy_timeout: int = 5_000
+
+    rate_limit_storage_uri: str = "mmap://rate_limits.mmap?slots=65536"
+
+    response_cache_max_bytes: int = 16 * 1024 * 1024
+    response_cache_ttl: float = 300
+
+    calculator_cache_max_bytes: int = 4 * 1024 * 1024
+    calculator_cache_ttl: float = 3600
 
     debug: bool = True
 
+    metrics_enabled: bool = True
+
+    query_timing_enabled: bool = True
+    query_n_plus_one_threshold: int = 10
+
+    profiler_sample_rate: int = 100
+    profiler_interval: float = 0.005
+    profiler_flush_interval: float = 10
+    profiler_report_path: str = "profiler.txt"
+    profiler_top: int = 20
+
     app_title: str = "Operations"
     app_description: str = "Operations API"
     app_version: str = "0.1.0"
@@ -17,6 +53,18 @@ class Config(BaseSettings):
     token_type: str = ""
     access_token_expires_minutes: int = 15
 
+    password_hasher: str = "bcrypt"
+    password_bcrypt_rounds: int = 12
+    password_scrypt_n: int = 2**15
+    password_scrypt_r: int = 8
+    password_scrypt_p: int = 1
+
+    hashing_workers: int = 4
+    hashing_queue_size: int = 16
+
+    principal_cache_max_size: int = 10_000
+    principal_cache_ttl: float = 30
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
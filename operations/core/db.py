@@ -1,11 +1,116 @@
-from sqlalchemy import create_engine
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
-from .config import get_config
+from .config import Config, get_config
+from .metrics import collect_pools, metrics
+from .search import search_indexes
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def get_async_db_url(db_url: str) -> str:
+    url = make_url(db_url)
+    backend = url.get_backend_name()
+
+    if url.get_driver_name() in ("aiosqlite", "asyncpg") or backend not in ASYNC_DRIVERS:
+        return url.render_as_string(hide_password=False)
+
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+
+    if backend == "postgresql" and "sslmode" in url.query:
+        url = url.difference_update_query(["sslmode"]).update_query_dict(
+            {"ssl": url.query["sslmode"]}
+        )
+
+    return url.render_as_string(hide_password=False)
+
+
+def get_connect_args(db_url: str) -> dict[str, Any]:
+    if make_url(db_url).get_backend_name() == "sqlite":
+        return {"check_same_thread": False}
+    return {}
+
+
+def is_sqlite_memory(db_url: str) -> bool:
+    url = make_url(db_url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def get_engine_kwargs(db_url: str, config: Config) -> dict[str, Any]:
+    kwargs = {"connect_args": get_connect_args(db_url)}
+
+    # in-memory sqlite databases use a single connection pool without pool sizing
+    if not is_sqlite_memory(db_url):
+        kwargs |= {
+            "pool_size": config.db_pool_size,
+            "max_overflow": config.db_max_overflow,
+            "pool_recycle": config.db_pool_recycle,
+            "pool_timeout": config.db_pool_timeout,
+            "pool_pre_ping": config.db_pool_recycle > 0,
+        }
+
+    return kwargs
+
 
-engine = create_engine(get_config().db_url, connect_args={"check_same_thread": False})
+def get_sqlite_pragmas(config: Config) -> dict[str, str | int]:
+    return {
+        "journal_mode": config.db_sqlite_journal_mode,
+        "synchronous": config.db_sqlite_synchronous,
+        "mmap_size": config.db_sqlite_mmap_size,
+        "cache_size": config.db_sqlite_cache_size,
+        "temp_store": config.db_sqlite_temp_store,
+        "busy_timeout": config.db_sqlite_busy_timeout,
+    }
+
+
+def set_sqlite_pragmas(engine: Engine, config: Config) -> None:
+    if engine.url.get_backend_name() != "sqlite":
+        return
+
+    pragmas = get_sqlite_pragmas(config)
+
+    if is_sqlite_memory(engine.url.render_as_string()):
+        pragmas.pop("journal_mode")
+        pragmas.pop("mmap_size")
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:  # noqa: ARG001
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+
+def create_db_engine(db_url: str, config: Config) -> Engine:
+    db_engine = create_engine(db_url, **get_engine_kwargs(db_url, config))
+    set_sqlite_pragmas(db_engine, config)
+    return db_engine
+
+
+def create_async_db_engine(db_url: str, config: Config) -> AsyncEngine:
+    db_url = get_async_db_url(db_url)
+    db_engine = create_async_engine(db_url, **get_engine_kwargs(db_url, config))
+    set_sqlite_pragmas(db_engine.sync_engine, config)
+    return db_engine
+
+
+engine = create_db_engine(get_config().db_url, get_config())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine(get_config().db_url, get_config())
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+metrics.register(collect_pools({"primary": engine, "async": async_engine.sync_engine}))
+
 
 class Base(DeclarativeBase):
     pass
@@ -13,6 +118,7 @@ class Base(DeclarativeBase):
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    search_indexes.create_all(engine)
 
 
 def get_db():
@@ -21,3 +127,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,63 @@
+import inspect
+from collections.abc import Callable
+from functools import wraps
+from typing import Any
+
+from fastapi import Request, Response, status
+
+from .versions import get_row_name, versions
+
+
+def get_etag(*names: str) -> str:
+    return '"' + "-".join(str(number) for number in versions.get(*names)) + '"'
+
+
+def get_table_etag(table: str) -> str:
+    return get_etag(table)
+
+
+def get_row_etag(table: str, key: object) -> str:
+    return get_etag(get_row_name(table), get_row_name(table, key))
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def set_etag(request: Request, etag: str) -> None:
+    request.state.etag = etag
+
+
+def get_conditional_response(request: Request, response: Response) -> Response:
+    etag = getattr(request.state, "etag", None)
+
+    if etag is None:
+        return response
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return response
+
+
+def conditional(func: Callable) -> Callable:
+    # the ETag is only compared once the handler has found the resource, so a missing row
+    # still answers 404 whatever If-None-Match holds
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(request: Request, *args: Any, **kwargs: Any) -> Response:
+            return get_conditional_response(request, await func(request, *args, **kwargs))
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(request: Request, *args: Any, **kwargs: Any) -> Response:
+        return get_conditional_response(request, func(request, *args, **kwargs))
+
+    return wrapper
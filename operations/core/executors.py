@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+from typing import Any
+
+from .config import get_config
+from .metrics import collect_stats, metrics
+
+
+class ExecutorSaturatedError(Exception):
+    pass
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, max_workers: int, max_queue: int) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.running = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+        self._lock = Lock()
+        self._slots = BoundedSemaphore(max_workers + max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    def _record_start(self, submitted_at: float) -> None:
+        wait = time.perf_counter() - submitted_at
+
+        with self._lock:
+            self.running += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+    def _record_done(self, future: Future) -> None:
+        if not future.cancelled():
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+        self._slots.release()
+
+    def submit[T](self, func: Callable[..., T], *args: Any) -> Future[T]:
+        # a full queue fails right away so a burst can't hold callers for the whole backlog
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+
+            message = f"The {self.name} pool is busy, try again later"
+            raise ExecutorSaturatedError(message)
+
+        submitted_at = time.perf_counter()
+
+        def run() -> T:
+            self._record_start(submitted_at)
+            return func(*args)
+
+        with self._lock:
+            self.submitted += 1
+
+        future = self._executor.submit(run)
+        future.add_done_callback(self._record_done)
+        return future
+
+    def call[T](self, func: Callable[..., T], *args: Any) -> T:
+        return self.submit(func, *args).result()
+
+    async def run[T](self, func: Callable[..., T], *args: Any) -> T:
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            started = self.completed + self.running
+
+            return {
+                "workers": self.max_workers,
+                "queue_size": self.max_queue,
+                "running": self.running,
+                "queued": self.submitted - started,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds": self.wait_seconds,
+                "avg_wait_seconds": self.wait_seconds / started if started else 0.0,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+
+hashing_executor = BoundedExecutor(
+    name="hashing",
+    max_workers=get_config().hashing_workers,
+    max_queue=get_config().hashing_queue_size,
+)
+metrics.register(
+    collect_stats(
+        "operations_executor",
+        hashing_executor.stats,
+        ("submitted", "completed", "rejected", "wait_seconds"),
+        executor=hashing_executor.name,
+    )
+)
@@ -0,0 +1,203 @@
+import base64
+import hashlib
+import hmac
+import os
+import time
+from collections.abc import Iterator
+from typing import Protocol
+
+import bcrypt
+
+from .config import get_config
+
+
+class UnknownHasherError(Exception):
+    pass
+
+
+class PasswordHasher(Protocol):
+    scheme: str
+
+    def hash(self, password: str) -> str: ...
+
+    def verify(self, password: str, hashed_password: str) -> bool: ...
+
+    def identify(self, hashed_password: str) -> bool: ...
+
+    def needs_rehash(self, hashed_password: str) -> bool: ...
+
+    def get_parameters(self) -> dict[str, int]: ...
+
+    def iter_calibration(self) -> Iterator["PasswordHasher"]: ...
+
+
+class BcryptHasher:
+    scheme = "bcrypt"
+
+    MIN_ROUNDS = 4
+    MAX_ROUNDS = 31
+
+    def __init__(self, rounds: int = 12) -> None:
+        self.rounds = rounds
+
+    def hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+    def identify(self, hashed_password: str) -> bool:
+        return hashed_password.startswith(("$2a$", "$2b$", "$2y$"))
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        # bcrypt hashes look like $2b$<rounds>$<salt and hash>
+        return int(hashed_password.split("$")[2]) != self.rounds
+
+    def get_parameters(self) -> dict[str, int]:
+        return {"rounds": self.rounds}
+
+    def iter_calibration(self) -> Iterator["BcryptHasher"]:
+        for rounds in range(self.MIN_ROUNDS, self.MAX_ROUNDS + 1):
+            yield BcryptHasher(rounds)
+
+
+class ScryptHasher:
+    scheme = "scrypt"
+
+    MIN_N = 2**10
+    MAX_N = 2**24
+    SALT_SIZE = 16
+    KEY_SIZE = 32
+
+    def __init__(self, n: int = 2**15, r: int = 8, p: int = 1) -> None:
+        self.n = n
+        self.r = r
+        self.p = p
+
+    def _derive(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=128 * n * r * p * 2,
+            dklen=self.KEY_SIZE,
+        )
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(self.SALT_SIZE)
+        key = self._derive(password, salt, self.n, self.r, self.p)
+        return "$".join(
+            (
+                self.scheme,
+                str(self.n),
+                str(self.r),
+                str(self.p),
+                base64.b64encode(salt).decode("ascii"),
+                base64.b64encode(key).decode("ascii"),
+            )
+        )
+
+    def _parse(self, hashed_password: str) -> tuple[int, int, int, bytes, bytes]:
+        _, n, r, p, salt, key = hashed_password.split("$")
+        return int(n), int(r), int(p), base64.b64decode(salt), base64.b64decode(key)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        n, r, p, salt, key = self._parse(hashed_password)
+        return hmac.compare_digest(self._derive(password, salt, n, r, p), key)
+
+    def identify(self, hashed_password: str) -> bool:
+        return hashed_password.startswith(f"{self.scheme}$")
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        n, r, p, _, _ = self._parse(hashed_password)
+        return (n, r, p) != (self.n, self.r, self.p)
+
+    def get_parameters(self) -> dict[str, int]:
+        return {"n": self.n, "r": self.r, "p": self.p}
+
+    def iter_calibration(self) -> Iterator["ScryptHasher"]:
+        n = self.MIN_N
+
+        while n <= self.MAX_N:
+            yield ScryptHasher(n, self.r, self.p)
+            n *= 2
+
+
+class PasswordHasherRegistry:
+    def __init__(self, hashers: list[PasswordHasher], default: str) -> None:
+        self._hashers = {hasher.scheme: hasher for hasher in hashers}
+        self.default = self.get_scheme(default)
+
+    def get_scheme(self, scheme: str) -> PasswordHasher:
+        hasher = self._hashers.get(scheme)
+
+        if hasher is None:
+            message = f"Unknown password hash scheme '{scheme}'"
+            raise UnknownHasherError(message)
+
+        return hasher
+
+    def get(self, hashed_password: str) -> PasswordHasher:
+        for hasher in self._hashers.values():
+            if hasher.identify(hashed_password):
+                return hasher
+
+        message = "Unknown password hash scheme"
+        raise UnknownHasherError(message)
+
+    def hash(self, password: str) -> str:
+        return self.default.hash(password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self.get(hashed_password).verify(password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        hasher = self.get(hashed_password)
+        return hasher is not self.default or hasher.needs_rehash(hashed_password)
+
+
+def measure(hasher: PasswordHasher, samples: int = 3) -> float:
+    timings = []
+
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        hasher.hash("calibration password")
+        timings.append(time.perf_counter() - started_at)
+
+    return min(timings)
+
+
+def calibrate(
+    hasher: PasswordHasher, target_seconds: float
+) -> tuple[PasswordHasher, list[tuple[dict[str, int], float]]]:
+    chosen = None
+    timings = []
+
+    # every step doubles the work, so the first one over the target ends the search
+    for candidate in hasher.iter_calibration():
+        elapsed = measure(candidate)
+        timings.append((candidate.get_parameters(), elapsed))
+
+        if elapsed > target_seconds:
+            break
+
+        chosen = candidate
+
+    return chosen or next(hasher.iter_calibration()), timings
+
+
+def get_password_hashers() -> PasswordHasherRegistry:
+    config = get_config()
+    hashers = [
+        BcryptHasher(rounds=config.password_bcrypt_rounds),
+        ScryptHasher(
+            n=config.password_scrypt_n, r=config.password_scrypt_r, p=config.password_scrypt_p
+        ),
+    ]
+    return PasswordHasherRegistry(hashers, default=config.password_hasher)
+
+
+password_hashers = get_password_hashers()
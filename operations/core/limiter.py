@@ -0,0 +1,213 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+from threading import Lock
+from urllib.parse import parse_qs, urlparse
+
+from limits.storage import Storage
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from .config import get_config
+from .metrics import collect_stats, metrics
+
+# every slot holds the key hash, the window expiry and the hit count
+SLOT = struct.Struct("<QdQ")
+HEADER = struct.Struct("<8sQ")
+MAGIC = b"RLSLOTS1"
+
+
+def get_key_hash(key: str) -> int:
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    # 0 marks an empty slot
+    return int.from_bytes(digest, "little") or 1
+
+
+def get_route(key: str) -> str:
+    # slowapi keys look like LIMITER/<client>/<path>/<amount>/<multiples>/<granularity>
+    _, _, rest = key.partition("/")
+    _, _, rest = rest.partition("/")
+    return rest.rsplit("/", 3)[0] or key
+
+
+class MmapStorage(Storage):
+    STORAGE_SCHEME = ["mmap"]  # noqa: RUF012
+
+    DEFAULT_SLOTS = 65_536
+    PROBES = 8
+
+    def __init__(self, uri: str | None = None, wrap_exceptions: bool = False, **_: str) -> None:
+        super().__init__(uri, wrap_exceptions=wrap_exceptions)
+
+        parsed = urlparse(uri or "mmap://rate_limits.mmap")
+        query = parse_qs(parsed.query)
+
+        self.path = f"{parsed.netloc}{parsed.path}"
+        self.slots = int(query.get("slots", [self.DEFAULT_SLOTS])[0])
+        self.evictions = 0
+
+        self._lock = Lock()
+        self._fd: int | None = None
+        self._map: mmap.mmap | None = None
+        self._routes: dict[str, list[float]] = {}
+
+    @property
+    def base_exceptions(self) -> type[Exception]:
+        return OSError
+
+    def _open(self) -> mmap.mmap:
+        if self._map is not None:
+            return self._map
+
+        size = HEADER.size + SLOT.size * self.slots
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+        try:
+            header = os.pread(fd, HEADER.size, 0)
+
+            if len(header) != HEADER.size or HEADER.unpack(header) != (MAGIC, self.slots):
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, HEADER.pack(MAGIC, self.slots), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+        return self._map
+
+    def _offset(self, index: int) -> int:
+        return HEADER.size + SLOT.size * index
+
+    def _find(self, table: mmap.mmap, key_hash: int, now: float, *, create: bool) -> int | None:
+        start = key_hash % self.slots
+        free = None
+        oldest = None
+        oldest_expiry = float("inf")
+
+        for probe in range(self.PROBES):
+            index = (start + probe) % self.slots
+            slot_hash, expires_at, _ = SLOT.unpack_from(table, self._offset(index))
+
+            if slot_hash == key_hash:
+                return index
+
+            if free is None and (slot_hash == 0 or expires_at <= now):
+                free = index
+
+            if expires_at < oldest_expiry:
+                oldest, oldest_expiry = index, expires_at
+
+        if not create:
+            return None
+
+        if free is not None:
+            return free
+
+        # every probed slot holds a live window, so the one closest to expiring is dropped
+        self.evictions += 1
+        return oldest
+
+    def _run(self, key: str, operation: str, amount: int = 0, expiry: float = 0) -> float:
+        started_at = time.perf_counter()
+
+        with self._lock:
+            table = self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+            try:
+                now = time.time()
+                key_hash = get_key_hash(key)
+                index = self._find(table, key_hash, now, create=operation == "incr")
+                result = 0.0 if operation != "get_expiry" else now
+
+                if index is not None:
+                    offset = self._offset(index)
+                    slot_hash, expires_at, count = SLOT.unpack_from(table, offset)
+                    live = slot_hash == key_hash and expires_at > now
+
+                    if operation == "incr":
+                        if not live:
+                            count, expires_at = 0, now + expiry
+                        count += amount
+                        SLOT.pack_into(table, offset, key_hash, expires_at, count)
+                        result = count
+                    elif operation == "clear":
+                        SLOT.pack_into(table, offset, 0, 0, 0)
+                    elif live:
+                        result = count if operation == "get" else expires_at
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+            route = self._routes.setdefault(get_route(key), [0, 0.0])
+            route[0] += 1
+            route[1] += time.perf_counter() - started_at
+
+        return result
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        return int(self._run(key, "incr", amount, expiry))
+
+    def get(self, key: str) -> int:
+        return int(self._run(key, "get"))
+
+    def get_expiry(self, key: str) -> float:
+        return self._run(key, "get_expiry")
+
+    def clear(self, key: str) -> None:
+        self._run(key, "clear")
+
+    def check(self) -> bool:
+        return True
+
+    def reset(self) -> int | None:
+        with self._lock:
+            table = self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+            try:
+                used = sum(
+                    1
+                    for index in range(self.slots)
+                    if SLOT.unpack_from(table, self._offset(index))[0] != 0
+                )
+                table[HEADER.size :] = bytes(SLOT.size * self.slots)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+        return used
+
+    def stats(self) -> dict[str, object]:
+        # only the copy is taken under the lock, the slots are counted without blocking checks
+        with self._lock:
+            slots = self._open()[HEADER.size :]
+            routes = {
+                route: {"checks": int(checks), "avg_us": seconds / checks * 1_000_000}
+                for route, (checks, seconds) in self._routes.items()
+            }
+
+        now = time.time()
+        live = sum(
+            1
+            for slot_hash, expires_at, _ in SLOT.iter_unpack(slots)
+            if slot_hash != 0 and expires_at > now
+        )
+
+        return {
+            "slots": self.slots,
+            "live_keys": live,
+            "size": HEADER.size + SLOT.size * self.slots,
+            "evictions": self.evictions,
+            "routes": routes,
+        }
+
+
+limiter = Limiter(key_func=get_remote_address, storage_uri=get_config().rate_limit_storage_uri)
+storage = limiter._storage  # noqa: SLF001
+
+if isinstance(storage, MmapStorage):
+    metrics.register(collect_stats("operations_rate_limit_storage", storage.stats, ("evictions",)))
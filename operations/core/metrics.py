@@ -0,0 +1,267 @@
+import threading
+import weakref
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from anyio import to_thread
+from sqlalchemy import Engine
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+type Labels = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class MetricFamily:
+    name: str
+    kind: str
+    help_text: str
+    samples: list[tuple[Labels, float]] = field(default_factory=list)
+
+
+type Collector = Callable[[], Iterable[MetricFamily]]
+
+
+class Shard:
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self) -> None:
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.histograms: dict[tuple[str, Labels], list[float]] = {}
+
+    def merge(self, shard: "Shard") -> None:
+        for key, value in dict(shard.counters).items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+        for key, counts in dict(shard.histograms).items():
+            merged = self.histograms.setdefault(key, [0] * len(counts))
+            for index, count in enumerate(list(counts)):
+                merged[index] += count
+
+
+class ShardHolder:
+    __slots__ = ("__weakref__", "shard")
+
+    def __init__(self, shard: Shard) -> None:
+        self.shard = shard
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: list[Shard] = []
+        self._retired = Shard()
+        self._descriptions: dict[str, tuple[str, str]] = {}
+        self._collectors: list[Collector] = []
+
+    def _get_shard(self) -> Shard:
+        # every thread writes to its own shard, so recording never takes a lock
+        holder = getattr(self._local, "holder", None)
+
+        if holder is None:
+            holder = self._local.holder = ShardHolder(Shard())
+            # the holder goes with the thread's locals, so idle threadpool workers that exit
+            # leave their counts behind instead of their shard
+            weakref.finalize(holder, self._retire, holder.shard)
+            with self._lock:
+                self._shards.append(holder.shard)
+
+        return holder.shard
+
+    def _retire(self, shard: Shard) -> None:
+        with self._lock:
+            self._shards.remove(shard)
+            self._retired.merge(shard)
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._descriptions[name] = (kind, help_text)
+
+    def register(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1) -> None:
+        counters = self._get_shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        histograms = self._get_shard().histograms
+        key = (name, labels)
+        counts = histograms.get(key)
+
+        if counts is None:
+            # one count per bucket, one for +Inf and the running sum last
+            counts = histograms[key] = [0] * (len(self.buckets) + 2)
+
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def _merge(self) -> tuple[dict[tuple[str, Labels], float], dict[tuple[str, Labels], list]]:
+        merged = Shard()
+
+        with self._lock:
+            merged.merge(self._retired)
+            shards = list(self._shards)
+
+        for shard in shards:
+            merged.merge(shard)
+
+        return merged.counters, merged.histograms
+
+    def _get_histogram_lines(self, name: str, labels: Labels, counts: list[float]) -> list[str]:
+        lines = []
+        cumulative = 0
+
+        for le, count in zip((*map(format_value, self.buckets), "+Inf"), counts, strict=False):
+            cumulative += count
+            bucket_labels = format_labels((*labels, ("le", le)))
+            lines.append(f"{name}_bucket{bucket_labels} {format_value(cumulative)}")
+
+        lines.append(f"{name}_sum{format_labels(labels)} {format_value(counts[-1])}")
+        lines.append(f"{name}_count{format_labels(labels)} {format_value(cumulative)}")
+        return lines
+
+    def render(self) -> str:
+        counters, histograms = self._merge()
+        families: dict[str, MetricFamily] = {}
+
+        def get_family(name: str, kind: str, help_text: str) -> MetricFamily:
+            kind, help_text = self._descriptions.get(name, (kind, help_text))
+            return families.setdefault(name, MetricFamily(name, kind, help_text))
+
+        for (name, labels), value in counters.items():
+            get_family(name, "counter", name).samples.append((labels, value))
+
+        for collector in self._collectors:
+            for family in collector():
+                merged = get_family(family.name, family.kind, family.help_text)
+                merged.samples.extend(family.samples)
+
+        lines = []
+
+        for family in sorted(families.values(), key=lambda family: family.name):
+            lines.append(f"# HELP {family.name} {family.help_text}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            lines.extend(
+                f"{family.name}{format_labels(labels)} {format_value(value)}"
+                for labels, value in sorted(family.samples)
+            )
+
+        for name in sorted({name for name, _ in histograms}):
+            kind, help_text = self._descriptions.get(name, ("histogram", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for (_, labels), counts in sorted(
+                (key, counts) for key, counts in histograms.items() if key[0] == name
+            ):
+                lines.extend(self._get_histogram_lines(name, labels, counts))
+
+        return "\n".join(lines) + "\n"
+
+
+def collect_stats(
+    prefix: str,
+    stats: Callable[[], Mapping[str, Any]],
+    counters: Iterable[str] = (),
+    **labels: str,
+) -> Collector:
+    counters = frozenset(counters)
+    label_items = tuple(labels.items())
+
+    def collect() -> list[MetricFamily]:
+        families = []
+
+        for key, value in stats().items():
+            # nested breakdowns such as the per route limiter checks are left to their own reports
+            if not isinstance(value, int | float):
+                continue
+
+            if key in counters:
+                family = MetricFamily(f"{prefix}_{key}_total", "counter", f"Total {key}")
+            else:
+                family = MetricFamily(f"{prefix}_{key}", "gauge", f"Current {key}")
+
+            family.samples.append((label_items, value))
+            families.append(family)
+
+        return families
+
+    return collect
+
+
+def collect_pools(engines: Mapping[str, Engine]) -> Collector:
+    def collect() -> list[MetricFamily]:
+        checked_out = MetricFamily(
+            "operations_db_pool_checked_out", "gauge", "Connections checked out of the pool"
+        )
+        overflow = MetricFamily(
+            "operations_db_pool_overflow", "gauge", "Connections opened over the pool size"
+        )
+        size = MetricFamily("operations_db_pool_size", "gauge", "Configured pool size")
+
+        for name, engine in engines.items():
+            pool = engine.pool
+
+            # sqlite memory databases and other pools without sizing have nothing to report
+            if not isinstance(pool, QueuePool):
+                continue
+
+            labels = (("engine", name),)
+            checked_out.samples.append((labels, pool.checkedout()))
+            overflow.samples.append((labels, max(pool.overflow(), 0)))
+            size.samples.append((labels, pool.size()))
+
+        return [checked_out, overflow, size]
+
+    return collect
+
+
+def collect_threadpool() -> list[MetricFamily]:
+    statistics = to_thread.current_default_thread_limiter().statistics()
+
+    return [
+        MetricFamily(
+            "operations_threadpool_busy",
+            "gauge",
+            "Worker threads running sync endpoints and dependencies",
+            [((), statistics.borrowed_tokens)],
+        ),
+        MetricFamily(
+            "operations_threadpool_size",
+            "gauge",
+            "Worker thread limit",
+            [((), statistics.total_tokens)],
+        ),
+        MetricFamily(
+            "operations_threadpool_queued",
+            "gauge",
+            "Calls waiting for a free worker thread",
+            [((), statistics.tasks_waiting)],
+        ),
+    ]
+
+
+metrics = MetricsRegistry()
+metrics.register(collect_threadpool)
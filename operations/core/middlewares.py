@@ -1,14 +1,124 @@
-import sqltap
-from starlette.types import ASGIApp, Receive, Scope, Send
+import time
 
+from starlette import status
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class SqltapProfilerMiddleware:
+from .metrics import metrics
+from .profiling import profiler
+from .queries import query_tracker
+
+metrics.describe("operations_http_requests_in_flight", "gauge", "Requests currently being handled")
+metrics.describe(
+    "operations_http_requests_total", "counter", "Requests handled by route and status"
+)
+metrics.describe(
+    "operations_http_request_duration_seconds", "histogram", "Request latency by route"
+)
+metrics.describe(
+    "operations_rate_limit_rejections_total", "counter", "Requests rejected by the rate limiter"
+)
+
+
+def get_route_path(scope: Scope) -> str:
+    route = scope.get("route")
+
+    if route is None:
+        return scope["path"]
+
+    # routers included lazily match their routes against what's left after the prefix
+    path = scope["path"]
+    for index, char in enumerate(path):
+        if char == "/" and route.path_regex.match(path[index:]):
+            return path[:index] + route.path
+
+    return route.path
+
+
+def get_route_name(scope: Scope) -> str:
+    return f"{scope['method']} {get_route_path(scope)}"
+
+
+class SamplingProfilerMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not profiler.should_sample():
+            await self.app(scope, receive, send)
+            return
+
+        profile, started_at = profiler.start()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.finish(get_route_name(scope), profile, started_at)
+
+
+class QueryTimingMiddleware:
     def __init__(self, app: ASGIApp) -> None:
         self.app = app
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        profiler = sqltap.start()
-        response = await self.app(scope, receive, send)
-        statistics = profiler.collect()
-        sqltap.report(statistics, filename="profiler.txt", report_format="text")
-        return response
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = query_tracker.start()
+        started_at = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - started_at) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries", '
+                    f"app;dur={app_ms:.2f}",
+                )
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_tracker.check(get_route_name(scope), stats)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started_at = time.perf_counter()
+        metrics.inc("operations_http_requests_in_flight")
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.inc("operations_http_requests_in_flight", amount=-1)
+
+            # unmatched paths are grouped so scanners can't create a series per url
+            path = get_route_path(scope) if "endpoint" in scope else "unmatched"
+            labels = (("method", scope["method"]), ("route", path))
+            metrics.observe(
+                "operations_http_request_duration_seconds", labels, time.perf_counter() - started_at
+            )
+            metrics.inc("operations_http_requests_total", (*labels, ("status", str(status_code))))
+
+            if status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+                metrics.inc("operations_rate_limit_rejections_total", labels)
@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import to_jsonable_python
+from sqlalchemy import (
+    BindParameter,
+    Column,
+    ColumnElement,
+    DateTime,
+    Table,
+    and_,
+    literal,
+    or_,
+    true,
+    tuple_,
+)
+from sqlalchemy.dialects import sqlite
+
+
+class InvalidCursorError(Exception):
+    pass
+
+
+def bind_value(column: Column, value: Any) -> BindParameter:
+    type_ = column.type
+
+    # func.now() stores timestamps without microseconds in sqlite, so the bound value must use
+    # the same text format to compare equal
+    if isinstance(type_, DateTime) and value.microsecond == 0:
+        type_ = type_.with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
+    return literal(value, type_)
+
+
+class Keyset:
+    def __init__(self, table: Table, order_by: Iterable[str]) -> None:
+        self._keys: list[tuple[Column, bool]] = []
+
+        for field in order_by:
+            name, _, direction = field.partition(" ")
+            self._keys.append((table.c[name], direction.upper() == "DESC"))
+
+        # the primary key breaks ties so every row has a unique position, in the direction of the
+        # last key so the whole key can be compared as one row value
+        tie_descending = self._keys[-1][1] if self._keys else False
+
+        for column in table.primary_key.columns:
+            if column not in [key_column for key_column, _ in self._keys]:
+                self._keys.append((column, tie_descending))
+
+        self._fields = [
+            f"{column.name} {'DESC' if descending else 'ASC'}" for column, descending in self._keys
+        ]
+
+    def order_by(self) -> list[ColumnElement]:
+        return [column.desc() if descending else column.asc() for column, descending in self._keys]
+
+    def encode(self, item: Any) -> str:
+        values = [getattr(item, column.key) for column, _ in self._keys]
+        payload = json.dumps(
+            {"order_by": self._fields, "values": to_jsonable_python(values)},
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode(self, cursor: str) -> list[Any]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            order_by, values = payload["order_by"], payload["values"]
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+            message = "Invalid cursor"
+            raise InvalidCursorError(message) from None
+
+        if order_by != self._fields or len(values) != len(self._keys):
+            message = "Cursor doesn't match the requested ordering"
+            raise InvalidCursorError(message)
+
+        try:
+            return [
+                TypeAdapter(column.type.python_type).validate_python(value)
+                for (column, _), value in zip(self._keys, values, strict=True)
+            ]
+        except ValidationError:
+            message = "Invalid cursor"
+            raise InvalidCursorError(message) from None
+
+    def after(self, cursor: str | None) -> ColumnElement[bool]:
+        if cursor is None:
+            return true()
+
+        values = [
+            bind_value(column, value)
+            for (column, _), value in zip(self._keys, self.decode(cursor), strict=True)
+        ]
+        directions = {descending for _, descending in self._keys}
+
+        if len(directions) == 1:
+            columns = tuple_(*(column for column, _ in self._keys))
+            bound = tuple_(*values)
+            return columns < bound if directions.pop() else columns > bound
+
+        conditions = []
+
+        for index, (column, descending) in enumerate(self._keys):
+            equal = [
+                key_column == values[i] for i, (key_column, _) in enumerate(self._keys[:index])
+            ]
+            beyond = column < values[index] if descending else column > values[index]
+            conditions.append(and_(*equal, beyond))
+
+        return or_(*conditions)
+
+    def get_next_cursor(self, items: Sequence[Any], limit: int) -> str | None:
+        if not items or len(items) < limit:
+            return None
+
+        return self.encode(items[-1])
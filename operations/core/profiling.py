@@ -0,0 +1,286 @@
+import itertools
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Engine, event
+
+from .config import get_config
+
+PACKAGE_DIR = str(Path(__file__).resolve().parent.parent)
+MAX_STACK_DEPTH = 12
+# background threads never run a request's code even when they inherit its context
+EXCLUDED_THREADS = ("versions", "replica-sync", "hashing", "profiler")
+
+
+@dataclass
+class ActiveProfile:
+    sql: list[tuple[str, float]] = field(default_factory=list)
+    stacks: dict[str, int] = field(default_factory=dict)
+    threads: dict[int, int] = field(default_factory=dict)
+
+
+@dataclass
+class RouteProfile:
+    requests: int = 0
+    seconds: float = 0
+    sql: dict[str, list[float]] = field(default_factory=dict)
+    stacks: dict[str, int] = field(default_factory=dict)
+
+    def add(self, active: ActiveProfile, seconds: float) -> None:
+        self.requests += 1
+        self.seconds += seconds
+
+        for statement, elapsed in active.sql:
+            totals = self.sql.setdefault(statement, [0, 0.0])
+            totals[0] += 1
+            totals[1] += elapsed
+
+        for stack, samples in active.stacks.items():
+            self.stacks[stack] = self.stacks.get(stack, 0) + samples
+
+    def to_dict(self, interval: float, top: int) -> dict[str, Any]:
+        sql = sorted(self.sql.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        stacks = sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)[:top]
+
+        return {
+            "requests": self.requests,
+            "avg_ms": self.seconds / self.requests * 1000 if self.requests else 0.0,
+            "sql": [
+                {
+                    "statement": statement,
+                    "count": int(count),
+                    "total_ms": seconds * 1000,
+                    "per_request": count / self.requests,
+                }
+                for statement, (count, seconds) in sql
+            ],
+            "stacks": [
+                {"stack": stack, "samples": samples, "estimated_ms": samples * interval * 1000}
+                for stack, samples in stacks
+            ],
+        }
+
+
+def get_stack(frame: Any) -> str | None:
+    frames = []
+
+    # threads without application code on the stack are idle workers or the event loop waiting
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+
+        if code.co_filename.startswith(PACKAGE_DIR):
+            break
+
+        frame = frame.f_back
+    else:
+        return None
+
+    # the stack ends at the innermost app frame, so deep library calls keep their caller
+    if len(frames) > MAX_STACK_DEPTH:
+        frames = [*frames[: MAX_STACK_DEPTH - 1], "...", frames[-1]]
+
+    return ";".join(reversed(frames))
+
+
+class SamplingProfiler:
+    def __init__(
+        self, sample_rate: int, interval: float, flush_interval: float, report_path: str, top: int
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.report_path = report_path
+        self.top = top
+
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._routes: dict[str, RouteProfile] = {}
+        self._profiles: dict[int, ActiveProfile] = {}
+        self._has_active = threading.Event()
+        self._dirty = False
+        self._threads: list[threading.Thread] = []
+        self._current: ContextVar[ActiveProfile | None] = ContextVar("profile", default=None)
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and next(self._counter) % self.sample_rate == 0
+
+    def _ensure_threads(self) -> None:
+        if self._threads:
+            return
+
+        with self._lock:
+            if self._threads:
+                return
+
+            for target in (self._sample, self._flush):
+                name = f"profiler{target.__name__}"
+                thread = threading.Thread(target=target, name=name, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _sample(self) -> None:
+        while True:
+            self._has_active.wait()
+            time.sleep(self.interval)
+
+            frames = sys._current_frames()  # noqa: SLF001
+
+            with self._lock:
+                # async requests share the event loop thread, so they share the samples taken
+                # there while they overlap
+                for profile in self._profiles.values():
+                    for thread_id in profile.threads:
+                        frame = frames.get(thread_id)
+                        stack = get_stack(frame) if frame is not None else None
+
+                        if stack is not None:
+                            profile.stacks[stack] = profile.stacks.get(stack, 0) + 1
+
+    def _flush(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def start(self) -> tuple[ActiveProfile, float]:
+        self._ensure_threads()
+        profile = ActiveProfile(threads={threading.get_ident(): 1})
+        self._current.set(profile)
+
+        with self._lock:
+            self._profiles[id(profile)] = profile
+            self._has_active.set()
+
+        return profile, time.perf_counter()
+
+    def finish(self, route: str, profile: ActiveProfile, started_at: float) -> None:
+        seconds = time.perf_counter() - started_at
+
+        with self._lock:
+            self._profiles.pop(id(profile), None)
+            if not self._profiles:
+                self._has_active.clear()
+
+            self._routes.setdefault(route, RouteProfile()).add(profile, seconds)
+            self._dirty = True
+
+    def _enter_thread(self, profile: ActiveProfile) -> None:
+        if threading.current_thread().name.startswith(EXCLUDED_THREADS):
+            return
+
+        thread_id = threading.get_ident()
+
+        with self._lock:
+            profile.threads[thread_id] = profile.threads.get(thread_id, 0) + 1
+
+    def _exit_thread(self, profile: ActiveProfile) -> None:
+        thread_id = threading.get_ident()
+
+        with self._lock:
+            if thread_id not in profile.threads:
+                return
+
+            profile.threads[thread_id] -= 1
+            if not profile.threads[thread_id]:
+                del profile.threads[thread_id]
+
+    @contextmanager
+    def thread(self) -> Iterator[None]:
+        profile = self._current.get()
+
+        if profile is None:
+            yield
+            return
+
+        self._enter_thread(profile)
+        try:
+            yield
+        finally:
+            self._exit_thread(profile)
+
+    def track_thread(self, func: Callable) -> Callable:
+        # sync endpoints run in the threadpool, which only carries the request's context over
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with self.thread():
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def _before_execute(self, context: Any, **_: Any) -> None:
+        profile = self._current.get()
+
+        if profile is not None:
+            context.profiler_started_at = time.perf_counter()
+            self._enter_thread(profile)
+
+    def _after_execute(self, context: Any, statement: str, **_: Any) -> None:
+        profile = self._current.get()
+        started_at = getattr(context, "profiler_started_at", None)
+
+        if profile is not None and started_at is not None:
+            profile.sql.append((statement, time.perf_counter() - started_at))
+            self._exit_thread(profile)
+
+    def install(self) -> None:
+        # listening on the class covers the primary, async and replica engines alike
+        if not event.contains(Engine, "before_cursor_execute", self._before_execute):
+            event.listen(Engine, "before_cursor_execute", self._before_execute, named=True)
+            event.listen(Engine, "after_cursor_execute", self._after_execute, named=True)
+
+    def report(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "routes": {
+                    route: profile.to_dict(self.interval, self.top)
+                    for route, profile in sorted(self._routes.items())
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._dirty = True
+
+    def get_text_report(self) -> str:
+        lines = []
+
+        for route, profile in self.report()["routes"].items():
+            lines.append(f"{route}: {profile['requests']} requests, {profile['avg_ms']:.2f}ms avg")
+
+            for sql in profile["sql"]:
+                statement = " ".join(sql["statement"].split())
+                lines.append(f"  sql {sql['count']}x {sql['total_ms']:.2f}ms: {statement}")
+
+            for stack in profile["stacks"]:
+                lines.append(f"  stack {stack['samples']} samples: {stack['stack']}")
+
+            lines.append("")
+
+        return "\n".join(lines)
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+
+        Path(self.report_path).write_text(self.get_text_report(), encoding="utf-8")
+
+
+profiler = SamplingProfiler(
+    sample_rate=get_config().profiler_sample_rate,
+    interval=get_config().profiler_interval,
+    flush_interval=get_config().profiler_flush_interval,
+    report_path=get_config().profiler_report_path,
+    top=get_config().profiler_top,
+)
@@ -0,0 +1,71 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Engine, event
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class QueryStats:
+    count: int = 0
+    seconds: float = 0
+    statements: dict[str, int] = field(default_factory=dict)
+
+    def get_repeated(self, threshold: int) -> dict[str, int]:
+        return {
+            statement: count for statement, count in self.statements.items() if count > threshold
+        }
+
+
+class QueryTracker:
+    def __init__(self, n_plus_one_threshold: int) -> None:
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+    def start(self) -> QueryStats:
+        stats = QueryStats()
+        self._current.set(stats)
+        return stats
+
+    def _before_execute(self, context: Any, **_: Any) -> None:
+        # kept on the execution context, so a statement that fails leaves nothing behind
+        if self._current.get() is not None:
+            context.queries_started_at = time.perf_counter()
+
+    def _after_execute(self, context: Any, statement: str, **_: Any) -> None:
+        stats = self._current.get()
+        started_at = getattr(context, "queries_started_at", None)
+
+        if stats is None or started_at is None:
+            return
+
+        stats.count += 1
+        stats.seconds += time.perf_counter() - started_at
+        # statements arrive with bound parameters as placeholders, so the text is the shape
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+    def install(self) -> None:
+        if not event.contains(Engine, "before_cursor_execute", self._before_execute):
+            event.listen(Engine, "before_cursor_execute", self._before_execute, named=True)
+            event.listen(Engine, "after_cursor_execute", self._after_execute, named=True)
+
+    def check(self, route: str, stats: QueryStats) -> None:
+        if self.n_plus_one_threshold <= 0:
+            return
+
+        for statement, count in stats.get_repeated(self.n_plus_one_threshold).items():
+            logger.warning(
+                "Possible N+1 on %s: statement ran %d times: %s",
+                route,
+                count,
+                " ".join(statement.split()),
+            )
+
+
+query_tracker = QueryTracker(n_plus_one_threshold=get_config().query_n_plus_one_threshold)
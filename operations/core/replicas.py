@@ -0,0 +1,247 @@
+import fcntl
+import os
+import sqlite3
+from collections.abc import Iterable
+from itertools import count
+from threading import Event, Lock, Thread
+from typing import Annotated
+
+from fastapi import Depends
+from sqlalchemy import Engine, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .config import Config, get_config
+from .db import Base, create_async_db_engine, get_async_db, is_sqlite_memory
+from .metrics import collect_pools, metrics
+from .versions import VersionDB, get_table_name, versions
+
+
+def get_sqlite_database(db_url: str) -> str | None:
+    url = make_url(db_url)
+
+    if url.get_backend_name() != "sqlite" or is_sqlite_memory(db_url):
+        return None
+
+    return url.database
+
+
+class ReadReplica:
+    def __init__(self, db_url: str, config: Config) -> None:
+        self.engine = create_async_db_engine(db_url, config)
+        self.session_maker = async_sessionmaker(
+            self.engine, autoflush=False, expire_on_commit=False
+        )
+
+        self._lock = Lock()
+        self._pending: dict[str, int] = {}
+
+    def mark_written(self, name: str) -> None:
+        table = get_table_name(name)
+        (version,) = versions.get(table)
+
+        with self._lock:
+            self._pending[table] = max(self._pending.get(table, 0), version)
+
+    async def _get_replicated(self, tables: Iterable[str]) -> dict[str, int]:
+        async with self.engine.connect() as connection:
+            result = await connection.execute(
+                select(VersionDB.name, VersionDB.version).where(VersionDB.name.in_(tables))
+            )
+            return dict(result.all())
+
+    async def is_fresh(self) -> bool:
+        pending = dict(self._pending)
+
+        if not pending:
+            return True
+
+        # the replica is used again only once it has replicated the versions of every table
+        # written since, so stale rows are never cached or tagged under current versions
+        try:
+            replicated = await self._get_replicated(pending)
+        except SQLAlchemyError:
+            return False
+
+        caught_up = [
+            table for table, version in pending.items() if replicated.get(table, 0) >= version
+        ]
+
+        with self._lock:
+            for table in caught_up:
+                if self._pending.get(table) == pending[table]:
+                    del self._pending[table]
+
+        return len(caught_up) == len(pending)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class SQLiteBackupReplica(ReadReplica):
+    def __init__(self, db_url: str, source: str, target: str, config: Config) -> None:
+        super().__init__(db_url, config)
+
+        self._source = source
+        self._target = target
+        self._interval = config.db_replica_sync_interval
+
+        self._connection: sqlite3.Connection | None = None
+        self._data_version: int | None = None
+        self._owner_fd: int | None = None
+        self._dirty = Event()
+        self._stopped = Event()
+        self._thread: Thread | None = None
+
+    def mark_written(self, name: str) -> None:
+        super().mark_written(name)
+        self._dirty.set()
+
+    def _acquire_owner(self) -> bool:
+        fd = os.open(f"{self._target}.sync-lock", os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        self._owner_fd = fd
+        return True
+
+    def _release_owner(self) -> None:
+        if self._owner_fd is not None:
+            fcntl.flock(self._owner_fd, fcntl.LOCK_UN)
+            os.close(self._owner_fd)
+            self._owner_fd = None
+
+    def sync(self) -> None:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self._source, check_same_thread=False)
+
+        # data_version only moves when another connection commits, so an unchanged source
+        # is not copied again
+        data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+        if data_version == self._data_version:
+            return
+
+        target = sqlite3.connect(self._target)
+
+        try:
+            self._connection.backup(target)
+        finally:
+            target.close()
+
+        self._data_version = data_version
+
+    def _run(self) -> None:
+        while self._dirty.wait() and not self._stopped.is_set():
+            self._stopped.wait(self._interval)
+            self._dirty.clear()
+
+            try:
+                self.sync()
+            except sqlite3.Error:
+                self._dirty.set()
+
+    def start(self) -> None:
+        # every worker shares the target file, so only the worker holding the lock copies to it
+        if self._thread is not None or not self._acquire_owner():
+            return
+
+        self.sync()
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, name=f"replica-sync:{self._target}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        self._stopped.set()
+        self._dirty.set()
+        self._thread.join()
+        self._thread = None
+
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+        self._release_owner()
+
+
+def create_read_replica(db_url: str, config: Config) -> ReadReplica:
+    source = get_sqlite_database(config.db_url)
+    target = get_sqlite_database(db_url)
+
+    if source is not None and target is not None:
+        return SQLiteBackupReplica(db_url, source, target, config)
+
+    return ReadReplica(db_url, config)
+
+
+class ReplicaSet:
+    def __init__(self, replicas: list[ReadReplica]) -> None:
+        self._replicas = replicas
+        self._counter = count()
+
+        if replicas:
+            versions.subscribe(self._on_write)
+
+    def _on_write(self, name: str) -> None:
+        for replica in self._replicas:
+            replica.mark_written(name)
+
+    async def choose(self) -> ReadReplica | None:
+        if not self._replicas:
+            return None
+
+        start = next(self._counter)
+
+        for offset in range(len(self._replicas)):
+            replica = self._replicas[(start + offset) % len(self._replicas)]
+            if await replica.is_fresh():
+                return replica
+
+        return None
+
+    def get_engines(self) -> dict[str, Engine]:
+        return {
+            f"replica{index}": replica.engine.sync_engine
+            for index, replica in enumerate(self._replicas)
+        }
+
+    def start(self) -> None:
+        for replica in self._replicas:
+            # a replica has to show the current version of every table before its first read
+            for table in Base.metadata.tables:
+                replica.mark_written(table)
+
+            replica.start()
+
+    async def dispose(self) -> None:
+        for replica in self._replicas:
+            replica.stop()
+            await replica.engine.dispose()
+
+
+replicas = ReplicaSet(
+    [create_read_replica(db_url, get_config()) for db_url in get_config().db_replica_urls]
+)
+metrics.register(collect_pools(replicas.get_engines()))
+
+
+async def get_async_read_db(db: Annotated[AsyncSession, Depends(get_async_db)]):
+    replica = await replicas.choose()
+
+    if replica is None:
+        yield db
+        return
+
+    async with replica.session_maker() as read_db:
+        yield read_db
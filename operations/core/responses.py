@@ -0,0 +1,16 @@
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    # StreamingResponse may listen for disconnects on `receive`, which would swallow the
+    # request body messages when the body iterator is still reading the upload.
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:  # noqa: ARG002
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect from None
+
+        if self.background is not None:
+            await self.background()
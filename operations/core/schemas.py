@@ -12,10 +12,25 @@ class BaseQueryParams(BaseModel):
     q: str = ""
     offset: int = 0
     limit: int = 10
+    cursor: str | None = None
+
+
+def get_meta(data: Any, next_cursor: str | None = None) -> dict[str, Any]:
+    is_array = isinstance(data, list)
+    meta = {
+        "kind": "array" if is_array else "object",
+        "length": len(data) if is_array else 1,
+    }
+
+    if next_cursor is not None:
+        meta["next_cursor"] = next_cursor
+
+    return meta
 
 
 class WrapperSchema[T](BaseModel):
     data: T
+    next_cursor: str | None = Field(default=None, exclude=True)
 
     @property
     def kind(self) -> Literal["array", "object"]:
@@ -27,7 +42,4 @@ class WrapperSchema[T](BaseModel):
 
     @computed_field
     def meta(self) -> dict[str, Any]:
-        return {
-            "kind": self.kind,
-            "length": self.length,
-        }
+        return get_meta(self.data, self.next_cursor)
@@ -0,0 +1,160 @@
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    Connection,
+    Engine,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    literal_column,
+    or_,
+    select,
+    text,
+    true,
+)
+
+ARABIC_DIACRITICS = (
+    "\u064b",  # fathatan
+    "\u064c",  # dammatan
+    "\u064d",  # kasratan
+    "\u064e",  # fatha
+    "\u064f",  # damma
+    "\u0650",  # kasra
+    "\u0651",  # shadda
+    "\u0652",  # sukun
+    "\u0670",  # superscript alef
+    "\u0640",  # tatweel
+)
+
+ARABIC_REPLACEMENTS = {
+    **dict.fromkeys(ARABIC_DIACRITICS, ""),
+    "\u0623": "\u0627",
+    "\u0625": "\u0627",
+    "\u0622": "\u0627",
+    "\u0671": "\u0627",
+    "\u0649": "\u064a",
+    "\u0626": "\u064a",
+    "\u0624": "\u0648",
+    "\u0629": "\u0647",
+}
+
+# trigram queries shorter than this match nothing, so they fall back to a LIKE scan
+MIN_MATCH_LENGTH = 3
+
+_TRANSLATION = str.maketrans(ARABIC_REPLACEMENTS)
+
+
+def normalize_search_text(value: str) -> str:
+    return value.translate(_TRANSLATION)
+
+
+def get_normalize_sql(expression: str) -> str:
+    for old, new in ARABIC_REPLACEMENTS.items():
+        expression = f"replace({expression}, '{old}', '{new}')"
+    return expression
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SearchIndex:
+    def __init__(self, *columns: Column) -> None:
+        self.table = columns[0].table
+        self.columns = tuple(column.name for column in columns)
+        self.name = f"{self.table.name}_search"
+        self.enabled = False
+
+        self._base_columns = columns
+        self._search_table = Table(
+            self.name,
+            MetaData(),
+            Column("rowid", Integer),
+            *(Column(column, String) for column in self.columns),
+        )
+
+    def _get_values_sql(self, prefix: str) -> str:
+        return ", ".join(get_normalize_sql(f"{prefix}.{column}") for column in self.columns)
+
+    def get_ddl(self) -> list[str]:
+        columns = ", ".join(self.columns)
+        insert = (
+            f"INSERT INTO {self.name} (rowid, {columns}) "
+            f"VALUES (new.rowid, {self._get_values_sql('new')});"
+        )
+        delete = f"DELETE FROM {self.name} WHERE rowid = old.rowid;"
+
+        return [
+            f"CREATE VIRTUAL TABLE {self.name} USING fts5({columns}, tokenize='trigram')",
+            f"CREATE TRIGGER {self.name}_insert AFTER INSERT ON {self.table.name} "
+            f"BEGIN {insert} END",
+            f"CREATE TRIGGER {self.name}_delete AFTER DELETE ON {self.table.name} "
+            f"BEGIN {delete} END",
+            f"CREATE TRIGGER {self.name}_update AFTER UPDATE OF {columns} ON {self.table.name} "
+            f"BEGIN {delete} {insert} END",
+        ]
+
+    def create(self, connection: Connection) -> None:
+        if not inspect(connection).has_table(self.name):
+            for statement in self.get_ddl():
+                connection.execute(text(statement))
+            self.rebuild(connection)
+
+        self.enabled = True
+
+    def rebuild(self, connection: Connection) -> None:
+        columns = ", ".join(self.columns)
+
+        connection.execute(text(f"DELETE FROM {self.name}"))
+        connection.execute(
+            text(
+                f"INSERT INTO {self.name} (rowid, {columns}) "
+                f"SELECT rowid, {self._get_values_sql(self.table.name)} FROM {self.table.name}"
+            )
+        )
+
+    def search(self, query: str) -> ColumnElement[bool]:
+        query = query.strip()
+
+        if not query:
+            return true()
+
+        if not self.enabled:
+            return or_(*(column.ilike(f"%{query}%") for column in self._base_columns))
+
+        query = normalize_search_text(query)
+
+        if len(query) >= MIN_MATCH_LENGTH:
+            phrase = '"{}"'.format(query.replace('"', '""'))
+            condition = literal_column(self.name).op("MATCH")(phrase)
+        else:
+            pattern = f"%{escape_like(query)}%"
+            condition = or_(
+                *(column.like(pattern, escape="\\") for column in self._search_table.columns[1:])
+            )
+
+        rowids = select(self._search_table.c.rowid).where(condition)
+        return literal_column(f"{self.table.name}.rowid").in_(rowids)
+
+
+class SearchIndexRegistry:
+    def __init__(self) -> None:
+        self._indexes: list[SearchIndex] = []
+
+    def add(self, *columns: Column) -> SearchIndex:
+        index = SearchIndex(*columns)
+        self._indexes.append(index)
+        return index
+
+    def create_all(self, engine: Engine) -> None:
+        if engine.dialect.name != "sqlite":
+            return
+
+        with engine.begin() as connection:
+            for index in self._indexes:
+                index.create(connection)
+
+
+search_indexes = SearchIndexRegistry()
@@ -0,0 +1,183 @@
+import inspect
+import types
+from collections.abc import Callable
+from decimal import Decimal
+from functools import cache, wraps
+from typing import Any, Union, get_args, get_origin
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+from .schemas import WrapperSchema, get_meta
+
+type Serializer = Callable[[Any], bytes]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+
+    message = f"Type is not JSON serializable: {type(value).__name__}"
+    raise TypeError(message)
+
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=orjson.OPT_UTC_Z)
+
+
+def _get_model(annotation: Any) -> tuple[type[BaseModel] | None, bool]:
+    origin = get_origin(annotation)
+
+    if origin in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _get_model(args[0]) if len(args) == 1 else (None, False)
+
+    if origin is list:
+        model, _ = _get_model(get_args(annotation)[0])
+        return model, True
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+
+    return None, False
+
+
+class ModelSerializer:
+    def __init__(self, schema: type[BaseModel]) -> None:
+        self._schema = schema
+        self._fields: list[tuple[str, str, ModelSerializer | None, bool]] = []
+
+        for name, field in schema.model_fields.items():
+            if field.exclude:
+                continue
+
+            model, many = _get_model(field.annotation)
+            nested = None if model is None else get_model_serializer(model)
+            self._fields.append((field.serialization_alias or name, name, nested, many))
+
+        self._computed = [
+            (field.alias or name, field.wrapped_property.fget)
+            for name, field in schema.model_computed_fields.items()
+        ]
+
+    def _construct(self, values: dict[str, Any]) -> BaseModel:
+        for _, name, nested, many in self._fields:
+            value = values[name]
+
+            if nested is not None and value is not None:
+                values[name] = (
+                    [nested.construct(item) for item in value] if many else nested.construct(value)
+                )
+
+        return self._schema.model_construct(**values)
+
+    def construct(self, obj: Any) -> BaseModel | None:
+        if obj is None or isinstance(obj, self._schema):
+            return obj
+
+        return self._construct({name: getattr(obj, name) for _, name, _, _ in self._fields})
+
+    def to_dict(self, obj: Any) -> dict[str, Any] | None:
+        if obj is None:
+            return None
+
+        values = {}
+        output = {}
+
+        for alias, name, nested, many in self._fields:
+            value = getattr(obj, name)
+            values[name] = value
+
+            if nested is not None and value is not None:
+                value = [nested.to_dict(item) for item in value] if many else nested.to_dict(value)
+
+            output[alias] = value
+
+        if self._computed:
+            # computed fields may call methods and properties of the schema, so they need an
+            # instance of it rather than the object being serialized
+            instance = obj if isinstance(obj, self._schema) else self._construct(values)
+            for alias, getter in self._computed:
+                output[alias] = getter(instance)
+
+        return output
+
+    def to_list(self, objs: list[Any]) -> list[dict[str, Any] | None]:
+        return [self.to_dict(obj) for obj in objs]
+
+
+@cache
+def get_model_serializer(schema: type[BaseModel]) -> ModelSerializer:
+    return ModelSerializer(schema)
+
+
+def _get_wrapper_serializer(response_model: Any) -> Serializer | None:
+    metadata = getattr(response_model, "__pydantic_generic_metadata__", None)
+
+    if not metadata or metadata["origin"] is not WrapperSchema:
+        return None
+
+    model, many = _get_model(metadata["args"][0])
+
+    if model is None:
+        return None
+
+    serializer = get_model_serializer(model)
+
+    def serialize(result: Any) -> bytes:
+        next_cursor = None
+
+        if isinstance(result, WrapperSchema):
+            next_cursor = result.next_cursor
+            result = result.data
+
+        data = serializer.to_list(result) if many else serializer.to_dict(result)
+        return dumps({"data": data, "meta": get_meta(data, next_cursor)})
+
+    return serialize
+
+
+@cache
+def get_serializer(response_model: Any) -> Serializer:
+    serializer = _get_wrapper_serializer(response_model)
+
+    if serializer is not None:
+        return serializer
+
+    model, many = _get_model(response_model)
+
+    if model is not None:
+        model_serializer = get_model_serializer(model)
+
+        if many:
+            return lambda result: dumps(model_serializer.to_list(result))
+        return lambda result: dumps(model_serializer.to_dict(result))
+
+    adapter = TypeAdapter(response_model)
+    return lambda result: adapter.dump_json(
+        adapter.validate_python(result, from_attributes=True), by_alias=True
+    )
+
+
+def serialized(response_model: Any) -> Callable:
+    serialize = get_serializer(response_model)
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Response:
+                result = await func(*args, **kwargs)
+                return Response(content=serialize(result), media_type="application/json")
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Response:
+            result = func(*args, **kwargs)
+            return Response(content=serialize(result), media_type="application/json")
+
+        return wrapper
+
+    return decorator
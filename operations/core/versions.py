@@ -0,0 +1,251 @@
+from collections.abc import Callable, Iterable
+from threading import Event, Lock, Thread
+
+from sqlalchemy import Connection, Engine, Index, String, delete, event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from .db import Base
+
+type VersionListener = Callable[[str], None]
+
+ALL = "*"
+
+PENDING_KEY = "versions_pending"
+WRITTEN_KEY = "versions_written"
+
+INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def get_row_name(table: str, key: object = ALL) -> str:
+    return f"{table}:{key}"
+
+
+def get_table_name(name: str) -> str:
+    return name.partition(":")[0]
+
+
+def is_row_name(name: str) -> bool:
+    return name != get_table_name(name) and name != get_row_name(get_table_name(name))
+
+
+class VersionDB(Base):
+    __tablename__ = "versions"
+
+    name: Mapped[str] = mapped_column(String(255), primary_key=True)
+    table_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    version: Mapped[int] = mapped_column(nullable=False)
+
+    __table_args__ = (Index("ix_versions_table_name_version", "table_name", "version"),)
+
+    def __repr__(self) -> str:
+        return f"<VersionDB(name={self.name}, version={self.version})>"
+
+
+def write_versions(connection: Connection, names: Iterable[str]) -> dict[str, int]:
+    insert = INSERTS[connection.dialect.name]
+    tables: dict[str, set[str]] = {}
+    written = {}
+
+    for name in names:
+        tables.setdefault(get_table_name(name), set()).add(name)
+
+    for table, table_names in sorted(tables.items()):
+        # the table row is bumped first and locked until commit, so rows written by concurrent
+        # transactions on the same table get increasing versions in commit order
+        statement = insert(VersionDB).values(name=table, table_name=table, version=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=[VersionDB.name], set_={"version": VersionDB.version + 1}
+        ).returning(VersionDB.version)
+        version = connection.execute(statement).scalar_one()
+        written[table] = version
+
+        rows = [
+            {"name": name, "table_name": table, "version": version}
+            for name in sorted(table_names - {table})
+        ]
+
+        if rows:
+            statement = insert(VersionDB).values(rows)
+            connection.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[VersionDB.name], set_={"version": statement.excluded.version}
+                )
+            )
+            written |= {row["name"]: version for row in rows}
+
+        # once all the rows are bumped their own versions no longer matter, so they're dropped to
+        # keep the table from growing with every key ever written
+        if get_row_name(table) in table_names:
+            connection.execute(
+                delete(VersionDB).where(
+                    VersionDB.table_name == table,
+                    VersionDB.name.not_in([table, get_row_name(table)]),
+                    VersionDB.version < version,
+                )
+            )
+
+    return written
+
+
+class VersionRegistry:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._versions: dict[str, int] = {}
+        self._synced: dict[str, int] = {}
+        self._listeners: list[VersionListener] = []
+
+        self._engine: Engine | None = None
+        self._max_rows = 0
+        self._stopped = Event()
+        self._thread: Thread | None = None
+
+    def get(self, *names: str) -> tuple[int, ...]:
+        return tuple(self._versions.get(name, 0) for name in names)
+
+    def bump(self, session: Session | AsyncSession, *names: str) -> None:
+        # written in the same transaction as the change when the session commits
+        session.info.setdefault(PENDING_KEY, set()).update(names)
+
+    def subscribe(self, listener: VersionListener) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _apply(self, versions: dict[str, int]) -> None:
+        changed = []
+
+        with self._lock:
+            for name, version in versions.items():
+                if version > self._versions.get(name, 0):
+                    self._versions[name] = version
+                    changed.append(name)
+
+            for name in changed:
+                table = get_table_name(name)
+
+                if name == get_row_name(table):
+                    self._drop_rows(table, self._versions[name])
+
+        for name in changed:
+            for listener in self._listeners:
+                listener(name)
+
+    def _drop_rows(self, table: str, version: int) -> None:
+        self._versions = {
+            name: row_version
+            for name, row_version in self._versions.items()
+            if row_version >= version or get_table_name(name) != table or not is_row_name(name)
+        }
+
+    def _before_commit(self, session: Session) -> None:
+        names = session.info.pop(PENDING_KEY, None)
+
+        if names:
+            session.info[WRITTEN_KEY] = write_versions(session.connection(), names)
+
+    def _after_commit(self, session: Session) -> None:
+        written = session.info.pop(WRITTEN_KEY, None)
+
+        if written:
+            self._apply(written)
+
+    def _after_rollback(self, session: Session) -> None:
+        session.info.pop(PENDING_KEY, None)
+        session.info.pop(WRITTEN_KEY, None)
+
+    def install(self) -> None:
+        if not event.contains(Session, "before_commit", self._before_commit):
+            event.listen(Session, "before_commit", self._before_commit)
+            event.listen(Session, "after_commit", self._after_commit)
+            event.listen(Session, "after_rollback", self._after_rollback)
+
+    def load(self, engine: Engine) -> None:
+        with engine.connect() as connection:
+            rows = connection.execute(
+                select(VersionDB.name, VersionDB.table_name, VersionDB.version)
+            ).all()
+
+        with self._lock:
+            for name, table, version in rows:
+                self._versions[name] = max(self._versions.get(name, 0), version)
+                if name == table:
+                    self._synced[name] = version
+
+    def sync(self) -> None:
+        if self._engine is None:
+            return
+
+        tables = [table for table in Base.metadata.tables if table != VersionDB.__tablename__]
+        changed: dict[str, int] = {}
+
+        with self._engine.connect() as connection:
+            statement = select(VersionDB.name, VersionDB.version).where(VersionDB.name.in_(tables))
+
+            for table, version in connection.execute(statement).all():
+                synced = self._synced.get(table, 0)
+
+                if version <= synced:
+                    continue
+
+                # only the rows bumped since the last sync are read, not the whole table
+                rows = connection.execute(
+                    select(VersionDB.name, VersionDB.version).where(
+                        VersionDB.table_name == table, VersionDB.version > synced
+                    )
+                ).all()
+                changed |= dict(rows)
+                self._synced[table] = version
+
+        if changed:
+            self._apply(changed)
+
+    def prune(self) -> None:
+        if self._engine is None or len(self._versions) <= self._max_rows:
+            return
+
+        tables = {get_table_name(name) for name in list(self._versions) if is_row_name(name)}
+
+        # bumping every row of a table drops the versions of its single rows
+        for table in sorted(tables):
+            with self._engine.begin() as connection:
+                written = write_versions(connection, [get_row_name(table)])
+
+            self._apply(written)
+
+    def _run(self, interval: float) -> None:
+        while not self._stopped.wait(interval):
+            try:
+                self.sync()
+                self.prune()
+            except SQLAlchemyError:
+                continue
+
+    def start(self, engine: Engine, interval: float, max_rows: int) -> None:
+        self._engine = engine
+        self._max_rows = max_rows
+        self.load(engine)
+
+        # other workers and commands only become visible through polling
+        if self._thread is not None or interval <= 0:
+            return
+
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, args=(interval,), name="versions", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+
+versions = VersionRegistry()
+versions.install()
@@ -1,18 +1,35 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from operations.api import v1
 from operations.core.config import get_config
-from operations.core.db import init_db
-from operations.core.middlewares import SqltapProfilerMiddleware
+from operations.core.db import async_engine, engine, init_db
+from operations.core.metrics import metrics
+from operations.core.middlewares import (
+    MetricsMiddleware,
+    QueryTimingMiddleware,
+    SamplingProfilerMiddleware,
+)
+from operations.core.profiling import profiler
+from operations.core.queries import query_tracker
+from operations.core.replicas import replicas
+from operations.core.versions import versions
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # noqa: ARG001
     init_db()
+    versions.start(
+        engine, get_config().db_versions_sync_interval, get_config().db_versions_max_rows
+    )
+    replicas.start()
     yield
+    versions.stop()
+    await replicas.dispose()
+    await async_engine.dispose()
+    profiler.flush()
 
 
 config = get_config()
@@ -34,8 +51,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-if config.debug:
-    app.add_middleware(SqltapProfilerMiddleware)
+if config.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+if config.query_timing_enabled:
+    query_tracker.install()
+    app.add_middleware(QueryTimingMiddleware)
+
+if config.debug and config.profiler_sample_rate > 0:
+    profiler.install()
+    app.add_middleware(SamplingProfilerMiddleware)
 
 # routers
 
@@ -45,3 +70,8 @@ app.include_router(v1.router, prefix="/api/v1")
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def get_metrics() -> Response:
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
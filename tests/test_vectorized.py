@@ -0,0 +1,109 @@
+import random
+from decimal import Decimal
+
+import pytest
+from syriantaxes import RoundingMethod
+
+from operations.apps.config.models import TaxesCalculatorConfigDB
+from operations.apps.ss.models import SocialSecurityDB
+from operations.apps.tax.models import BracketDB, TaxDB
+from operations.apps.taxes_calculator.context import CalculatorContext, CalculatorContextCache
+from operations.apps.taxes_calculator.schemas import GrossBatchRowOutSchema, GrossInSchema
+from operations.apps.taxes_calculator.services import (
+    TaxesCalculatorResolver,
+    TaxesCalculatorService,
+)
+
+BRACKETS = (
+    ("0.00", "837000.00", "0.00"),
+    ("837000.00", "850000.00", "0.11"),
+    ("850000.00", "1100000.00", "0.13"),
+    ("1100000.00", "25000000.00", "0.15"),
+)
+
+
+def get_context(method: RoundingMethod, to_nearest: Decimal) -> CalculatorContext:
+    tax = TaxDB(
+        id=1,
+        name="tax",
+        min_allowed_salary=Decimal("837000.00"),
+        fixed_tax_rate=Decimal("0.05"),
+        compensation_rate=Decimal("0.75"),
+        brackets=[
+            BracketDB(min=Decimal(low), max=Decimal(high), rate=Decimal(rate))
+            for low, high, rate in BRACKETS
+        ],
+    )
+    ss = SocialSecurityDB(
+        id=1,
+        name="ss",
+        deduction_rate=Decimal("0.07"),
+        min_allowed_salary=Decimal("750000.00"),
+    )
+    config = TaxesCalculatorConfigDB(
+        default_tax=tax,
+        default_ss=ss,
+        tax_rounding_method=method,
+        tax_rounding_to_nearest=to_nearest,
+        ss_rounding_method=method,
+        ss_rounding_to_nearest=to_nearest,
+    )
+    return CalculatorContext.from_config((0,), config)
+
+
+def get_amount(generator: random.Random) -> Decimal:
+    amount = Decimal(generator.randint(1, 300_000_000)) / generator.choice((1, 10, 100))
+    return generator.choice(
+        (
+            amount,
+            amount.quantize(Decimal("0.0001")),
+            amount.normalize(),
+            Decimal(generator.randint(1, 30)).scaleb(5),
+        )
+    )
+
+
+def get_rows(generator: random.Random, count: int) -> list[GrossInSchema]:
+    return [
+        GrossInSchema(
+            salary=get_amount(generator),
+            compensation=generator.choice((Decimal(0), Decimal("0.00"), get_amount(generator))),
+            ss_salary=generator.choice(
+                (None, Decimal(0), Decimal("750000.000"), get_amount(generator))
+            ),
+        )
+        for _ in range(count)
+    ]
+
+
+def calculate_row(
+    service: TaxesCalculatorService, context: CalculatorContext, index: int, row: GrossInSchema
+) -> GrossBatchRowOutSchema:
+    try:
+        result = service.calculate_gross(
+            salary=row.salary,
+            compensation=row.compensation,
+            tax=context.default_tax,
+            rounder=context.tax_rounder,
+            ss=context.default_ss,
+            ss_salary=row.ss_salary,
+        )
+    except ValueError as e:
+        return GrossBatchRowOutSchema(index=index, error=str(e))
+
+    return GrossBatchRowOutSchema(index=index, result=result)
+
+
+@pytest.mark.parametrize("method", list(RoundingMethod))
+@pytest.mark.parametrize("to_nearest", ["100", "1", "0.01", "50", "100.00", "1E+2", "0.50"])
+def test_batch_matches_decimal_path(method: RoundingMethod, to_nearest: str) -> None:
+    context = get_context(method, Decimal(to_nearest))
+    resolver = TaxesCalculatorResolver(None, None, CalculatorContextCache(context))
+    service = TaxesCalculatorService()
+    rows = get_rows(random.Random(f"{method}-{to_nearest}"), 300)
+
+    results = service.calculate_gross_batch(rows, resolver, context.tax_rounder)
+
+    for index, row in enumerate(rows):
+        expected = calculate_row(service, context, index, row)
+        assert results[index].model_dump_json() == expected.model_dump_json(), row